@@ -0,0 +1,39 @@
+from django.utils.cache import cc_delim_re, patch_cache_control
+
+
+class SharedCacheMiddleware:
+    """
+    Let shared caches store pages that render the same HTML for every user.
+
+    Views mark those pages with Cache-Control: public. The session is still
+    touched on the way out (allauth checks it on every page), so SessionMiddleware
+    adds Vary: Cookie, which stops a cache from sharing the page between users.
+    This sits above SessionMiddleware and takes Cookie back out of Vary.
+
+    A public response that sets a cookie, for example when flash messages are
+    consumed, belongs to one user and is made private instead.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        cache_control = response.get("Cache-Control", "")
+        if "public" not in cc_delim_re.split(cache_control):
+            return response
+
+        if response.cookies:
+            patch_cache_control(response, private=True)
+            return response
+
+        vary = [
+            header
+            for header in cc_delim_re.split(response.get("Vary", ""))
+            if header and header.lower() != "cookie"
+        ]
+        if vary:
+            response["Vary"] = ", ".join(vary)
+        elif response.has_header("Vary"):
+            del response["Vary"]
+        return response
@@ -1,11 +1,11 @@
 # Register your models here.
 from django.contrib import admin
 
-from scripts import models
+from scripts import counters, models
 
 
 class ScriptVersionAdmin(admin.ModelAdmin):
-    readonly_fields = ["created"]
+    readonly_fields = ["created", *counters.COUNTER_FIELDS]
 
 
 admin.site.register(models.Character)
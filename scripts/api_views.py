@@ -1,7 +1,12 @@
+from django.middleware.csrf import get_token
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from scripts import models
+from scripts import characters, diffs, filters, models, statistics
 from collections import Counter
+from typing import Set
 
 
 class StatisticsAPI(APIView):
@@ -9,6 +14,7 @@ class StatisticsAPI(APIView):
 
     def get(self, request, format=None):
         counter = Counter()
+        catalog = characters.get_catalog()
         if "all" in request.query_params:
             queryset = models.ScriptVersion.objects.all()
         else:
@@ -17,41 +23,216 @@ class StatisticsAPI(APIView):
         for param in request.query_params.lists():
             if param[0] == "character":
                 for character in param[1]:
-                    try:
-                        character = models.Character.objects.get(character_id=character)
-                        queryset = queryset.filter(
-                            content__contains=[{"id": character.character_id}]
-                        )
-                    except models.Character.DoesNotExist:
+                    character = catalog.get(character)
+                    if character is None:
                         continue
+                    queryset = queryset.filter(filters.has_character(character))
             elif param[0] == "character_or":
-                orig_queryset = queryset.all()
-                queryset = models.ScriptVersion.objects.none()
-                for character in param[1]:
-                    try:
-                        character = models.Character.objects.get(character_id=character)
-                        queryset = queryset | orig_queryset.filter(
-                            content__contains=[{"id": character.character_id}]
-                        )
-                    except models.Character.DoesNotExist:
-                        continue
+                or_characters = [
+                    catalog.get(character)
+                    for character in param[1]
+                    if character in catalog
+                ]
+                queryset = queryset.filter(filters.has_any_character(or_characters))
             elif param[0] == "exclude":
                 for character in param[1]:
-                    try:
-                        character = models.Character.objects.get(character_id=character)
-                        queryset = queryset.exclude(
-                            content__contains=[{"id": character.character_id}]
-                        )
-                    except models.Character.DoesNotExist:
+                    character = catalog.get(character)
+                    if character is None:
                         continue
+                    queryset = queryset.exclude(filters.has_character(character))
 
-        for character in models.Character.objects.all():
-            counter[character.character_id] = queryset.filter(
-                content__contains=[{"id": character.character_id}]
-            ).count()
+        if any(
+            param in request.query_params
+            for param in ("character", "character_or", "exclude")
+        ):
+            total = None
+            counts = statistics.character_counts(queryset)
+        else:
+            total, counts = statistics.precomputed_character_counts(
+                latest_only="all" not in request.query_params
+            )
+
+        for character, count in counts.items():
+            counter[character.character_id] = count
         data = {}
         if "total" in request.query_params:
-            data["total"] = queryset.count()
+            data["total"] = queryset.count() if total is None else total
+        if "histograms" in request.query_params:
+            data["histograms"] = statistics.type_histograms(queryset)
         for character in counter.most_common():
             data[character[0]] = character[1]
         return Response(data)
+
+
+class CooccurrenceAPI(APIView):
+    """
+    Characters most often appearing alongside a character in the latest scripts.
+    """
+
+    permission_classes = []
+
+    def get(self, request, format=None):
+        character = characters.get_character(request.query_params.get("character"))
+        if character is None:
+            raise NotFound("Unknown character")
+
+        try:
+            num = int(request.query_params.get("num", 10))
+        except ValueError:
+            raise ParseError("num must be an integer")
+
+        total, count, partners = statistics.character_partners(
+            character, limit=max(num, 1)
+        )
+        return Response(
+            {
+                "character": character.character_id,
+                "count": count,
+                "total": total,
+                "partners": [
+                    {
+                        "character": partner.character.character_id,
+                        "count": partner.count,
+                        "lift": round(partner.lift, 3),
+                    }
+                    for partner in partners
+                ],
+            }
+        )
+
+
+class TimeseriesAPI(APIView):
+    """
+    How often a character has been included in uploaded scripts over time.
+    """
+
+    permission_classes = []
+
+    def get(self, request, format=None):
+        character = characters.get_character(request.query_params.get("character"))
+        if character is None:
+            raise NotFound("Unknown character")
+
+        bucket = request.query_params.get("bucket", "month")
+        if bucket not in statistics.TIMESERIES_BUCKETS:
+            raise ParseError(
+                f"bucket must be one of {', '.join(statistics.TIMESERIES_BUCKETS)}"
+            )
+
+        return Response(
+            {
+                "character": character.character_id,
+                "bucket": bucket,
+                "periods": statistics.character_timeseries(character, bucket),
+            }
+        )
+
+
+class ChurnAPI(APIView):
+    """
+    How often each character has been added to and removed from scripts between
+    versions.
+    """
+
+    permission_classes = []
+
+    def get(self, request, format=None):
+        diff_filters = diffs.parse_diff_filters(request.query_params)
+        version_diffs = diffs.filter_diffs(**diff_filters)
+        churn = diffs.character_churn(version_diffs)
+        data = {}
+        if "total" in request.query_params:
+            data["total"] = version_diffs.count()
+        for change, counter in churn.items():
+            data[change] = {
+                character.character_id: count
+                for character, count in counter.most_common()
+            }
+        return Response(data)
+
+
+@method_decorator(never_cache, name="dispatch")
+class UserStateAPI(APIView):
+    """
+    Everything about the current user that pages leave out of their HTML, so that
+    the HTML is the same for everyone and can be shared-cached.
+
+    Each parameter is a comma separated list of the ids on the page:
+    - versions: script versions with vote and favourite buttons;
+    - collections: script versions with an add to collection select, which get
+      the user's collections that don't contain them yet;
+    - scripts: scripts whose owner and comment controls are shown.
+
+    The answer only covers the ids asked for, in a fixed number of queries.
+    """
+
+    permission_classes = []
+    max_ids = 200
+    # Permissions that pages show controls for.
+    permissions = ["scripts.download_unsupported_json"]
+
+    def get_ids(self, request, param: str) -> Set[int]:
+        try:
+            ids = {
+                int(pk) for pk in request.query_params.get(param, "").split(",") if pk
+            }
+        except ValueError:
+            raise ParseError(f"{param} must be a comma separated list of ids")
+        if len(ids) > self.max_ids:
+            raise ParseError(f"At most {self.max_ids} {param} can be requested")
+        return ids
+
+    def get(self, request, format=None):
+        versions = self.get_ids(request, "versions")
+        collection_versions = self.get_ids(request, "collections")
+        scripts = self.get_ids(request, "scripts")
+
+        user = request.user
+        state = {
+            "authenticated": user.is_authenticated,
+            "is_staff": user.is_staff,
+            "csrf_token": get_token(request),
+            "permissions": [],
+            "voted": [],
+            "favourites": [],
+            "collections": [],
+            "owned": [],
+            "comments": [],
+        }
+        if not user.is_authenticated:
+            return Response(state)
+
+        state["permissions"] = [
+            permission for permission in self.permissions if user.has_perm(permission)
+        ]
+        if versions:
+            voted, favourites = models.ScriptVersion.objects.filter(
+                pk__in=versions
+            ).voted_and_favourited(user)
+            state["voted"] = sorted(voted)
+            state["favourites"] = sorted(favourites)
+        if collection_versions:
+            rows = models.Collection.scripts.through.objects.filter(
+                collection__owner=user, scriptversion__in=collection_versions
+            ).values_list("collection", "scriptversion")
+            memberships = {}
+            for collection, script_version in rows:
+                memberships.setdefault(collection, []).append(script_version)
+            state["collections"] = [
+                {"pk": pk, "name": name, "scripts": sorted(memberships.get(pk, []))}
+                for pk, name in user.collections.order_by("name").values_list(
+                    "pk", "name"
+                )
+            ]
+        if scripts:
+            state["owned"] = sorted(
+                models.Script.objects.filter(owner=user, pk__in=scripts).values_list(
+                    "pk", flat=True
+                )
+            )
+            state["comments"] = sorted(
+                models.Comment.objects.filter(user=user, script__in=scripts).values_list(
+                    "pk", flat=True
+                )
+            )
+        return Response(state)
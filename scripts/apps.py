@@ -1,5 +1,34 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 
 
 class ScriptsConfig(AppConfig):
     name = "scripts"
+
+    def ready(self):
+        from scripts import characters, counters, filters, models
+
+        # Name and author searches match at our word similarity, not pg_trgm's.
+        connection_created.connect(filters.set_trigram_threshold)
+
+        # Keep the in-memory character catalog in step with the database.
+        post_save.connect(characters.invalidate_catalog, sender=models.Character)
+        post_delete.connect(characters.invalidate_catalog, sender=models.Character)
+        # Bring the scripts using a character up to date when it's added or removed.
+        post_save.connect(characters.add_character_to_scripts, sender=models.Character)
+        pre_delete.connect(characters.remember_character_scripts, sender=models.Character)
+        post_delete.connect(
+            characters.remove_character_from_scripts, sender=models.Character
+        )
+
+        # Keep the stored ScriptVersion counters in step with their related objects.
+        post_save.connect(counters.increment_vote_count, sender=models.Vote)
+        post_delete.connect(counters.decrement_vote_count, sender=models.Vote)
+        post_save.connect(counters.increment_favourite_count, sender=models.Favourite)
+        post_delete.connect(counters.decrement_favourite_count, sender=models.Favourite)
+        post_save.connect(counters.increment_comment_count, sender=models.Comment)
+        post_delete.connect(counters.decrement_comment_count, sender=models.Comment)
+        m2m_changed.connect(
+            counters.update_tag_count, sender=models.ScriptVersion.tags.through
+        )
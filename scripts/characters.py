@@ -0,0 +1,172 @@
+import time
+from copy import copy
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from scripts import models
+
+
+class CharacterCatalog:
+    """
+    Read-only, in-memory view of every Character, keyed on character_id.
+
+    The catalog is loaded once per process and replaced whenever a Character is
+    saved or deleted in any process. Lookups return copies, so changing one doesn't
+    affect the catalog.
+    """
+
+    def __init__(self, characters: Iterable[models.Character], version: int):
+        self.version = version
+        self._characters: Dict[str, models.Character] = {
+            character.character_id: character for character in characters
+        }
+
+    def get(self, character_id: Optional[str]) -> Optional[models.Character]:
+        character = self._characters.get(character_id)
+        return None if character is None else copy(character)
+
+    def __contains__(self, character_id: Optional[str]) -> bool:
+        return character_id in self._characters
+
+    def __len__(self) -> int:
+        return len(self._characters)
+
+    def all(self) -> List[models.Character]:
+        return [copy(character) for character in self._characters.values()]
+
+
+def character_bit(character: models.Character) -> int:
+    """
+    The fingerprint bit for a character, or 0 if it hasn't been given a position.
+    """
+    if character.bit_position is None:
+        return 0
+    return 1 << character.bit_position
+
+
+# Saving or deleting a Character increments the CharacterCatalogVersion row in the
+# same transaction, and each process compares it against its catalog at most once
+# per interval. Characters rarely change, so other processes may keep the old
+# catalog for up to this many seconds.
+CATALOG_CHECK_INTERVAL = 30
+
+_catalog: Optional[CharacterCatalog] = None
+_checked_at = 0.0
+
+
+def catalog_version() -> int:
+    return (
+        models.CharacterCatalogVersion.objects.filter(pk=1)
+        .values_list("version", flat=True)
+        .first()
+        or 0
+    )
+
+
+def get_catalog() -> CharacterCatalog:
+    global _catalog, _checked_at
+    now = time.monotonic()
+    if _catalog is None or now - _checked_at >= CATALOG_CHECK_INTERVAL:
+        version = catalog_version()
+        if _catalog is None or _catalog.version != version:
+            _catalog = CharacterCatalog(models.Character.objects.order_by("pk"), version)
+        _checked_at = now
+    return _catalog
+
+
+def get_character(character_id: Optional[str]) -> Optional[models.Character]:
+    return get_catalog().get(character_id)
+
+
+def invalidate_catalog(**kwargs) -> None:
+    """
+    Signal handler that drops this process's catalog and increments the shared
+    version, so other processes reload theirs on their next check.
+    """
+    global _catalog
+    _catalog = None
+    updated = models.CharacterCatalogVersion.objects.filter(pk=1).update(
+        version=F("version") + 1
+    )
+    if not updated:
+        models.CharacterCatalogVersion.objects.get_or_create(
+            pk=1, defaults={"version": 1}
+        )
+
+
+def update_script_characters(script_version: models.ScriptVersion) -> None:
+    """
+    Rebuild the ScriptCharacter membership rows for a script version from its content.
+    """
+    catalog = get_catalog()
+    character_pks = set()
+    for item in script_version.content:
+        character = catalog.get(item.get("id"))
+        if character:
+            character_pks.add(character.pk)
+
+    models.ScriptCharacter.objects.filter(script_version=script_version).delete()
+    models.ScriptCharacter.objects.bulk_create(
+        [
+            models.ScriptCharacter(script_version=script_version, character_id=pk)
+            for pk in character_pks
+        ]
+    )
+
+
+def refresh_script_versions(script_versions: Iterable[models.ScriptVersion]) -> None:
+    """
+    Recompute everything stored on the script versions that depends on which of
+    their characters are known, as if they'd just been uploaded.
+    """
+    from scripts import minhash, script_json, search, statistics
+
+    catalog = get_catalog()
+    for script_version in script_versions:
+        with transaction.atomic():
+            statistics.record_script_version(script_version, -1)
+            fields = script_json.analyse_script(script_version.content).model_fields()
+            for field, value in fields.items():
+                setattr(script_version, field, value)
+            script_version.save(update_fields=list(fields))
+            update_script_characters(script_version)
+            minhash.update_signature(script_version)
+            statistics.record_script_version(script_version, 1)
+            search.update_search_vector(script_version, catalog)
+
+
+def add_character_to_scripts(sender, instance, created, **kwargs) -> None:
+    """
+    post_save handler that, when a Character is created, refreshes the script
+    versions already using its id.
+    """
+    if created:
+        refresh_script_versions(
+            models.ScriptVersion.objects.filter(
+                content__contains=[{"id": instance.character_id}]
+            ).select_related("script")
+        )
+
+
+def remember_character_scripts(sender, instance, **kwargs) -> None:
+    """
+    pre_delete handler noting the script versions with a Character, since their
+    ScriptCharacter rows are gone by post_delete.
+    """
+    instance._script_version_pks = list(
+        instance.script_versions.values_list("script_version", flat=True)
+    )
+
+
+def remove_character_from_scripts(sender, instance, **kwargs) -> None:
+    """
+    post_delete handler refreshing the script versions that had a Character, so
+    its fingerprint position can be reused.
+    """
+    refresh_script_versions(
+        models.ScriptVersion.objects.filter(
+            pk__in=getattr(instance, "_script_version_pks", [])
+        ).select_related("script")
+    )
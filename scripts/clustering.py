@@ -0,0 +1,189 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.db import transaction
+
+from scripts import constants, models
+
+# Rows of the script x character matrix multiplied against each other at a time.
+# Peak memory is a few chunk x chunk arrays, so it doesn't grow with the corpus.
+DEFAULT_CHUNK_SIZE = 2000
+# Similar pairs held at a time while building family trees, on top of the at most one
+# per row kept in the spanning forest.
+PAIR_BATCH_SIZE = 100000
+
+
+def character_matrix(fingerprints: List[int]):
+    """
+    Script x character matrix of 0s and 1s, one row per fingerprint with column n
+    set if bit n of the fingerprint is.
+    """
+    import numpy
+
+    width = constants.CHARACTER_FINGERPRINT_BITS // 8
+    packed = numpy.frombuffer(
+        b"".join(fingerprint.to_bytes(width, "little") for fingerprint in fingerprints),
+        dtype=numpy.uint8,
+    ).reshape(len(fingerprints), width)
+    return numpy.unpackbits(packed, axis=1, bitorder="little")
+
+
+def similar_pairs(
+    matrix, script_types: List[str], threshold: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[int, int, int]]:
+    """
+    (row, other row, similarity) of every pair of matrix rows at least threshold
+    percent similar, with row < other row.
+
+    Overlaps come from multiplying chunks of the matrix against each other, and are
+    compared against the larger script of the same type or the smaller otherwise,
+    rounding exactly as get_fingerprint_similarity does.
+    """
+    import numpy
+
+    types = numpy.unique(script_types, return_inverse=True)[1]
+    sizes = matrix.sum(axis=1, dtype=numpy.int64)
+    rows = len(matrix)
+    for start in range(0, rows, chunk_size):
+        stop = min(start + chunk_size, rows)
+        chunk = matrix[start:stop].astype(numpy.float32)
+        for other_start in range(start, rows, chunk_size):
+            other_stop = min(other_start + chunk_size, rows)
+            other = matrix[other_start:other_stop].astype(numpy.float32)
+            # Overlaps are at most the number of fingerprint bits, so exact in float32.
+            overlap = (chunk @ other.T).astype(numpy.float64)
+
+            size = sizes[start:stop, None]
+            other_size = sizes[None, other_start:other_stop]
+            same_type = types[start:stop, None] == types[None, other_start:other_stop]
+            denominator = numpy.where(
+                same_type,
+                numpy.maximum(size, other_size),
+                numpy.minimum(size, other_size),
+            )
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                similarity = numpy.where(
+                    denominator > 0, numpy.round(overlap / denominator * 100), 0
+                )
+
+            similar = similarity >= threshold
+            if other_start == start:
+                similar = numpy.triu(similar, k=1)
+            for row, other_row in zip(*numpy.nonzero(similar)):
+                yield (
+                    start + int(row),
+                    other_start + int(other_row),
+                    int(similarity[row, other_row]),
+                )
+
+
+def spanning_forest(
+    rows: int, pairs: List[Tuple[int, int, int]]
+) -> List[Tuple[int, int, int]]:
+    """
+    The pairs of a maximum spanning forest over the rows, joining the pairs most
+    similar first.
+    """
+    parents = list(range(rows))
+
+    def find(row):
+        while parents[row] != row:
+            parents[row] = parents[parents[row]]
+            row = parents[row]
+        return row
+
+    forest = []
+    for pair in sorted(pairs, key=lambda x: (-x[2], x[0], x[1])):
+        root, other_root = find(pair[0]), find(pair[1])
+        if root == other_root:
+            continue
+        parents[max(root, other_root)] = min(root, other_root)
+        forest.append(pair)
+    return forest
+
+
+def family_trees(
+    rows: int,
+    pairs: Iterable[Tuple[int, int, int]],
+    batch_size: int = PAIR_BATCH_SIZE,
+) -> List[Dict[int, Tuple[int, int]]]:
+    """
+    Connected components of the pairs with at least two rows, each as a mapping of
+    row to (parent row, similarity) with the lowest row as the parent-less root.
+
+    Pairs are joined most similar first, so the trees are maximum spanning trees and
+    every parent link is as strong as it can be. A pair left out of the spanning
+    forest of some of the pairs is never in the forest of all of them, so pairs are
+    consumed in batches that are merged into the forest so far, and only the forest
+    and one batch are held at a time.
+    """
+    forest = []
+    batch = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            forest = spanning_forest(rows, forest + batch)
+            batch = []
+    forest = spanning_forest(rows, forest + batch)
+
+    links = {}
+    for row, other_row, similarity in forest:
+        links.setdefault(row, []).append((other_row, similarity))
+        links.setdefault(other_row, []).append((row, similarity))
+
+    trees = []
+    visited = set()
+    for row in sorted(links):
+        if row in visited:
+            continue
+        tree = {row: (None, None)}
+        visited.add(row)
+        stack = [row]
+        while stack:
+            current = stack.pop()
+            for linked, similarity in links[current]:
+                if linked not in visited:
+                    visited.add(linked)
+                    tree[linked] = (current, similarity)
+                    stack.append(linked)
+        trees.append(tree)
+    return trees
+
+
+def build_clusters(
+    threshold: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> List[models.ScriptCluster]:
+    """
+    Replace the stored clusters with the family trees of latest script versions at
+    least threshold percent similar. Scripts similar to no other aren't stored.
+    """
+    versions = list(
+        models.ScriptVersion.objects.filter(latest=True)
+        .order_by("pk")
+        .values_list("pk", "script_type", "fingerprint")
+    )
+    pks = [pk for pk, _, _ in versions]
+    matrix = character_matrix([fingerprint for _, _, fingerprint in versions])
+    pairs = similar_pairs(
+        matrix, [script_type for _, script_type, _ in versions], threshold, chunk_size
+    )
+    trees = family_trees(len(versions), pairs)
+
+    with transaction.atomic():
+        models.ScriptCluster.objects.all().delete()
+        clusters = models.ScriptCluster.objects.bulk_create(
+            [models.ScriptCluster(threshold=threshold, size=len(tree)) for tree in trees]
+        )
+        models.ScriptClusterMember.objects.bulk_create(
+            [
+                models.ScriptClusterMember(
+                    cluster=cluster,
+                    script_version_id=pks[row],
+                    parent_id=None if parent is None else pks[parent],
+                    value=value,
+                )
+                for cluster, tree in zip(clusters, trees)
+                for row, (parent, value) in tree.items()
+            ],
+            batch_size=1000,
+        )
+    return clusters
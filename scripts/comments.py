@@ -0,0 +1,69 @@
+from typing import Dict, List, Tuple
+
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+
+from scripts import constants, models
+
+# Comment paths are the zero padded primary keys of a comment's ancestors and then
+# itself, each followed by a slash, so ordering on the path gives the threads depth
+# first with replies in the order they were made.
+SEGMENT_LENGTH = constants.COMMENT_PATH_DIGITS + 1
+# Deeper replies are shown at this indent.
+MAX_INDENT = 6
+THREADS_PER_PAGE = 50
+
+
+def delete_comment(comment: models.Comment) -> None:
+    """
+    Delete a comment, moving its replies up to its parent, or to the top level if it
+    doesn't have one, with two bulk updates.
+    """
+    parent_path = comment.parent.path if comment.parent else ""
+    with transaction.atomic():
+        comment.children.update(parent=comment.parent)
+        models.Comment.objects.filter(
+            script=comment.script_id, path__startswith=comment.path
+        ).exclude(pk=comment.pk).update(
+            path=Concat(Value(parent_path), Substr("path", len(comment.path) + 1))
+        )
+        comment.delete()
+
+
+def get_comment_threads(script: models.Script, page_number=1) -> Tuple[Page, List[Dict]]:
+    """
+    A page of a script's comment threads, and each of their comments in display
+    order with how far it should be indented.
+
+    Threads are paginated on their top level comment, then the page's comments are
+    loaded with a single query ordered on path.
+    """
+    roots = (
+        script.comments.annotate(root=Substr("path", 1, SEGMENT_LENGTH))
+        .values_list("root", flat=True)
+        .order_by("root")
+        .distinct()
+    )
+    page = Paginator(roots, THREADS_PER_PAGE).get_page(page_number)
+    page_roots = list(page.object_list)
+    if not page_roots:
+        return page, []
+
+    comments = []
+    ancestors = []
+    # "~" sorts after every digit and slash, so this covers the last thread's replies.
+    queryset = (
+        script.comments.filter(path__gte=page_roots[0], path__lt=page_roots[-1] + "~")
+        .select_related("user")
+        .order_by("path")
+    )
+    for comment in queryset:
+        # Deleting a user deletes their comments without moving the replies, so
+        # indent on how many of the comment's ancestors are shown, not its depth.
+        while ancestors and not comment.path.startswith(ancestors[-1]):
+            ancestors.pop()
+        comments.append({"comment": comment, "indent": min(len(ancestors), MAX_INDENT)})
+        ancestors.append(comment.path)
+    return page, comments
@@ -1,3 +1,14 @@
 # A list of constants that should be consistent across database/form usage
 MAX_SCRIPT_NAME_LENGTH=100
 MAX_AUTHOR_NAME_LENGTH=100
+# Width of the ScriptVersion character fingerprint, i.e. the maximum number of characters.
+CHARACTER_FINGERPRINT_BITS=512
+# MinHash signature length, split into MINHASH_BANDS locality sensitive hashing bands.
+# More bands of fewer rows find more approximate candidates at the cost of speed.
+MINHASH_PERMUTATIONS=64
+MINHASH_BANDS=16
+# Zero padded width of each primary key in a Comment's materialized path.
+COMMENT_PATH_DIGITS=12
+# Minimum pg_trgm word similarity for name and author searches to match. pg_trgm's
+# own default of 0.6 misses short and misspelt queries.
+TRIGRAM_WORD_SIMILARITY_THRESHOLD=0.3
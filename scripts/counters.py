@@ -0,0 +1,142 @@
+from typing import Iterable
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from scripts import models
+
+# Stored ScriptVersion counters and the related objects they count.
+COUNTER_FIELDS = ["score", "num_favs", "num_comments", "num_tags"]
+
+# Script versions corrected per UPDATE by reconcile_counters.
+RECONCILE_BATCH_SIZE = 500
+
+
+def increment_vote_count(sender, instance, created, **kwargs):
+    if created:
+        models.ScriptVersion.objects.filter(pk=instance.script_id).update(
+            score=F("score") + 1
+        )
+
+
+def decrement_vote_count(sender, instance, **kwargs):
+    models.ScriptVersion.objects.filter(pk=instance.script_id).update(
+        score=F("score") - 1
+    )
+
+
+def increment_favourite_count(sender, instance, created, **kwargs):
+    if created:
+        models.ScriptVersion.objects.filter(pk=instance.script_id).update(
+            num_favs=F("num_favs") + 1
+        )
+
+
+def decrement_favourite_count(sender, instance, **kwargs):
+    models.ScriptVersion.objects.filter(pk=instance.script_id).update(
+        num_favs=F("num_favs") - 1
+    )
+
+
+def increment_comment_count(sender, instance, created, **kwargs):
+    # Comments belong to a Script, so every version shows the same count.
+    if created:
+        models.ScriptVersion.objects.filter(script=instance.script_id).update(
+            num_comments=F("num_comments") + 1
+        )
+
+
+def decrement_comment_count(sender, instance, **kwargs):
+    models.ScriptVersion.objects.filter(script=instance.script_id).update(
+        num_comments=F("num_comments") - 1
+    )
+
+
+def update_tag_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    m2m_changed handler for ScriptVersion.tags, from either side of the relation.
+    """
+    if action == "pre_clear" and reverse:
+        # The affected script versions aren't passed to post_clear, so remember them.
+        instance._cleared_script_versions = list(
+            instance.scriptversion_set.values_list("pk", flat=True)
+        )
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        script_versions = [instance.pk]
+    elif action == "post_clear":
+        script_versions = getattr(instance, "_cleared_script_versions", [])
+    else:
+        script_versions = pk_set
+    recount_tags(script_versions)
+
+
+def recount_tags(script_versions: Iterable[int]) -> None:
+    models.ScriptVersion.objects.filter(pk__in=script_versions).update(
+        num_tags=live_counts()["num_tags"]
+    )
+
+
+def live_count(model, field: str, outer_field: str = "pk") -> Subquery:
+    """
+    Subquery counting the rows of model whose field references the outer ScriptVersion.
+    """
+    return Subquery(
+        model.objects.filter(**{field: OuterRef(outer_field)})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+
+def live_counts():
+    """
+    Expressions recomputing each stored counter from the related tables.
+    """
+    return {
+        "score": Coalesce(live_count(models.Vote, "script"), 0),
+        "num_favs": Coalesce(live_count(models.Favourite, "script"), 0),
+        # Comments belong to the Script, so each version counts all of its comments.
+        "num_comments": Coalesce(live_count(models.Comment, "script", "script"), 0),
+        "num_tags": Coalesce(
+            live_count(models.ScriptVersion.tags.through, "scriptversion"), 0
+        ),
+    }
+
+
+def reconcile_counters(fix: bool = True) -> int:
+    """
+    Compare the stored counters against the related tables, optionally correcting
+    them. Returns the number of script versions that were out of date.
+    """
+    live = {f"live_{field}": expression for field, expression in live_counts().items()}
+    mismatched = Q()
+    for field in COUNTER_FIELDS:
+        mismatched |= ~Q(**{field: F(f"live_{field}")})
+
+    stale = (
+        models.ScriptVersion.objects.annotate(**live)
+        .filter(mismatched)
+        .only("pk", *COUNTER_FIELDS)
+    )
+    if not fix:
+        return stale.count()
+
+    count = 0
+    batch = []
+    for script_version in stale.iterator():
+        count += 1
+        for field in COUNTER_FIELDS:
+            setattr(script_version, field, getattr(script_version, f"live_{field}"))
+        batch.append(script_version)
+        if len(batch) == RECONCILE_BATCH_SIZE:
+            models.ScriptVersion.objects.bulk_update(batch, COUNTER_FIELDS)
+            batch = []
+    if batch:
+        models.ScriptVersion.objects.bulk_update(batch, COUNTER_FIELDS)
+    return count
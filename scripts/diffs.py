@@ -0,0 +1,250 @@
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, QuerySet
+
+from scripts import characters, models
+
+
+def character_ids(content: List) -> List[str]:
+    """
+    The distinct character ids in a script JSON, in script order, without _meta.
+    """
+    ids = []
+    for item in content:
+        id = item.get("id") if isinstance(item, dict) else item
+        if id and id != "_meta" and id not in ids:
+            ids.append(id)
+    return ids
+
+
+def diff_content(old_content: List, new_content: List) -> Tuple[List[str], List[str]]:
+    """
+    The character ids added and removed going from old_content to new_content.
+    """
+    old_ids = character_ids(old_content)
+    new_ids = character_ids(new_content)
+    old_set = set(old_ids)
+    new_set = set(new_ids)
+    added = [id for id in new_ids if id not in old_set]
+    removed = [id for id in old_ids if id not in new_set]
+    return added, removed
+
+
+def group_by_type(ids: List[str], catalog) -> Dict[str, List[str]]:
+    """
+    Character ids grouped on their CharacterType value, keeping their order. Ids
+    that aren't in the catalog, such as homebrew characters, are grouped as Unknown.
+    """
+    groups = {type.value: [] for type in models.CharacterType}
+    groups["Unknown"] = []
+    for id in ids:
+        character = catalog.get(id)
+        groups[character.character_type if character else "Unknown"].append(id)
+    return groups
+
+
+def compare_content(
+    old_content: List, new_content: List, catalog=None
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    The characters added, removed and unchanged going from old_content to
+    new_content, each grouped by CharacterType.
+    """
+    catalog = catalog or characters.get_catalog()
+    added, removed = diff_content(old_content, new_content)
+    removed_set = set(removed)
+    unchanged = [id for id in character_ids(old_content) if id not in removed_set]
+    return {
+        "added": group_by_type(added, catalog),
+        "removed": group_by_type(removed, catalog),
+        "unchanged": group_by_type(unchanged, catalog),
+    }
+
+
+# Script version content never changes, so comparisons only need to be recomputed
+# when the characters do.
+COMPARISON_TIMEOUT = 60 * 60 * 24
+
+
+def compare_versions(
+    old_version: models.ScriptVersion, new_version: models.ScriptVersion
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    compare_content of two script versions, cached on their primary keys.
+    """
+    catalog = characters.get_catalog()
+    key = f"compare:{catalog.version}:{old_version.pk}:{new_version.pk}"
+    comparison = cache.get(key)
+    if comparison is None:
+        comparison = compare_content(old_version.content, new_version.content, catalog)
+        cache.set(key, comparison, COMPARISON_TIMEOUT)
+    return comparison
+
+
+def previous_version(
+    script_version: models.ScriptVersion,
+) -> Optional[models.ScriptVersion]:
+    return (
+        script_version.script.versions.filter(version__lt=script_version.version)
+        .order_by("-version")
+        .first()
+    )
+
+
+def next_version(script_version: models.ScriptVersion) -> Optional[models.ScriptVersion]:
+    return (
+        script_version.script.versions.filter(version__gt=script_version.version)
+        .order_by("version")
+        .first()
+    )
+
+
+def write_version_diff(
+    script_version: models.ScriptVersion,
+    previous: Optional[models.ScriptVersion],
+    catalog=None,
+) -> Optional[models.ScriptVersionDiff]:
+    """
+    Replace the diff of a script version against the given previous version. The
+    first version of a script has no diff.
+    """
+    catalog = catalog or characters.get_catalog()
+    with transaction.atomic():
+        models.ScriptVersionDiff.objects.filter(script_version=script_version).delete()
+        if previous is None:
+            return None
+
+        added, removed = diff_content(previous.content, script_version.content)
+        diff = models.ScriptVersionDiff.objects.create(
+            script_version=script_version,
+            previous_version=previous,
+            added=added,
+            removed=removed,
+        )
+        changes = []
+        for ids, is_addition in ((added, True), (removed, False)):
+            for id in ids:
+                character = catalog.get(id)
+                if character:
+                    changes.append(
+                        models.CharacterChange(
+                            diff=diff, character=character, added=is_addition
+                        )
+                    )
+        models.CharacterChange.objects.bulk_create(changes)
+    return diff
+
+
+def update_version_diff(
+    script_version: models.ScriptVersion,
+) -> Optional[models.ScriptVersionDiff]:
+    return write_version_diff(script_version, previous_version(script_version))
+
+
+def record_upload(script_version: models.ScriptVersion) -> None:
+    """
+    Diff a newly uploaded version, and the version after it if an older version has
+    been uploaded into the middle of a script's history.
+    """
+    update_version_diff(script_version)
+    following = next_version(script_version)
+    if following:
+        write_version_diff(following, script_version)
+
+
+def version_history(script_version: models.ScriptVersion) -> Dict:
+    """
+    The stored diffs of a script up to and including the script version, newest
+    first, keyed on the version they lead to.
+    """
+    rows = (
+        models.ScriptVersionDiff.objects.filter(
+            script_version__script=script_version.script_id,
+            script_version__version__lte=script_version.version,
+        )
+        .order_by("-script_version__version")
+        .values_list(
+            "script_version__version", "previous_version__version", "added", "removed"
+        )
+    )
+    return {
+        version: {
+            "additions": added,
+            "deletions": removed,
+            "previous_version": previous,
+        }
+        for version, previous, added, removed in rows
+    }
+
+
+def filter_diffs(
+    tags: Optional[Union[models.ScriptTag, int]] = None,
+    edition: Optional[models.Edition] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> QuerySet:
+    """
+    Diffs of scripts whose latest version has the tag, given as a ScriptTag or its
+    pk, of versions no later than the edition, uploaded between since and until
+    inclusive.
+    """
+    diffs = models.ScriptVersionDiff.objects.all()
+    if tags is not None:
+        diffs = diffs.filter(
+            script_version__script__in=models.Script.objects.filter(
+                versions__latest=True, versions__tags=tags
+            )
+        )
+    if edition is not None:
+        diffs = diffs.filter(script_version__edition__lte=edition)
+    if since is not None:
+        diffs = diffs.filter(script_version__created__date__gte=since)
+    if until is not None:
+        diffs = diffs.filter(script_version__created__date__lte=until)
+    return diffs
+
+
+def character_churn(diffs: QuerySet) -> Dict[str, Counter]:
+    """
+    How many of the diffs added and removed each Character, from one GROUP BY over
+    their changes. Every character in the catalog is included, so ones that were
+    never added or removed count as zero.
+    """
+    rows = (
+        models.CharacterChange.objects.filter(diff__in=diffs.values("pk"))
+        .values_list("character", "added")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    counts = {(character, added): count for character, added, count in rows}
+
+    churn = {"additions": Counter(), "removals": Counter()}
+    for character in characters.get_catalog().all():
+        churn["additions"][character] = counts.get((character.pk, True), 0)
+        churn["removals"][character] = counts.get((character.pk, False), 0)
+    return churn
+
+
+def parse_diff_filters(params) -> Dict:
+    """
+    filter_diffs arguments from request parameters, ignoring any that are invalid.
+    """
+    filters = {}
+    try:
+        filters["tags"] = models.ScriptTag.objects.get(pk=params["tags"])
+    except (KeyError, ValueError, models.ScriptTag.DoesNotExist):
+        pass
+    try:
+        filters["edition"] = models.Edition(int(params["edition"]))
+    except (KeyError, ValueError):
+        pass
+    for param in ("since", "until"):
+        try:
+            filters[param] = date.fromisoformat(params[param])
+        except (KeyError, ValueError):
+            pass
+    return filters
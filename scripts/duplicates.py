@@ -0,0 +1,65 @@
+import hashlib
+from typing import Dict, List
+
+from django.db.models import Count, QuerySet
+
+from scripts import diffs, models
+
+
+def content_hash(content: List) -> str:
+    """
+    Hash of the distinct character ids in a script JSON, sorted and without _meta,
+    so that scripts with the same characters in any order hash the same.
+    """
+    ids = sorted(diffs.character_ids(content))
+    return hashlib.sha256("\n".join(ids).encode()).hexdigest()
+
+
+def same_content(script_version: models.ScriptVersion, content: List) -> bool:
+    """
+    Whether content is exactly the script version's content. The stored hash rules
+    out most differing content without comparing the JSON.
+    """
+    if script_version.content_hash and script_version.content_hash != content_hash(
+        content
+    ):
+        return False
+    return script_version.content == content
+
+
+def find_duplicates(script_version: models.ScriptVersion) -> QuerySet:
+    """
+    Latest versions of other scripts with the same characters as the script version.
+    """
+    if not script_version.content_hash:
+        return models.ScriptVersion.objects.none()
+    return (
+        models.ScriptVersion.objects.filter(
+            content_hash=script_version.content_hash, latest=True
+        )
+        .exclude(script=script_version.script_id)
+        .select_related("script")
+        .order_by("pk")
+    )
+
+
+def duplicate_clusters() -> Dict[str, List[models.ScriptVersion]]:
+    """
+    Latest script versions grouped by content hash, for every hash shared by more
+    than one script.
+    """
+    hashes = (
+        models.ScriptVersion.objects.filter(latest=True)
+        .values("content_hash")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+        .values("content_hash")
+    )
+    clusters = {}
+    for script_version in (
+        models.ScriptVersion.objects.filter(latest=True, content_hash__in=hashes)
+        .select_related("script")
+        .order_by("content_hash", "pk")
+    ):
+        clusters.setdefault(script_version.content_hash, []).append(script_version)
+    return clusters
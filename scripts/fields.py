@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+class BitStringField(models.Field):
+    """
+    Fixed width Postgres bit string, exposed to Python as a non-negative int where
+    bit n of the int is position n of the string counting from the right.
+    """
+
+    description = "Fixed width bit string"
+
+    def __init__(self, *args, length: int, **kwargs):
+        self.length = length
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["length"] = self.length
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return f"bit({self.length})"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return int(value, 2)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return int(value, 2)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                "'%(value)s' must be a string of 0s and 1s.",
+                code="invalid",
+                params={"value": value},
+            )
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return format(int(value), f"0{self.length}b")
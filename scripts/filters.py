@@ -1,11 +1,13 @@
 import re
+from typing import List, Tuple
 
 import django_filters
 from django_filters import rest_framework as filters
 from django import forms
-from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Exists, OuterRef, Q
 
-from scripts import models, widgets
+from scripts import characters, constants, models, search, widgets
 
 edition_choices = (
     (models.Edition.BASE, models.Edition.BASE.label),
@@ -22,25 +24,93 @@ def get_characters_not_in_edition(edition: models.Edition):
     return models.Character.objects.filter(edition__gt=edition)
 
 
-def annotate_queryset(queryset, field, value):
-    return queryset.annotate(similarity=TrigramSimilarity(field, value))
+def trigram_search(queryset, field, value, similarity="similarity"):
+    """
+    Pre-filter with the %> operator, which can use the trigram indexes, before
+    annotating the similarity used for ranking.
+
+    Word similarity compares the value against the closest part of the field, so
+    short or partial queries still match long names. The threshold it matches at is
+    set on each connection by set_trigram_threshold.
+    """
+    queryset = queryset.filter(**{f"{field}__trigram_word_similar": value})
+    return queryset.annotate(**{similarity: TrigramWordSimilarity(value, field)})
+
+
+def set_trigram_threshold(sender, connection, **kwargs):
+    """
+    connection_created handler setting the word similarity the %> operator used by
+    trigram_search matches at.
+    """
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+            [str(constants.TRIGRAM_WORD_SIMILARITY_THRESHOLD)],
+        )
+
+
+def has_character(character: models.Character) -> Exists:
+    return Exists(
+        models.ScriptCharacter.objects.filter(
+            script_version=OuterRef("pk"), character=character
+        )
+    )
 
 
-def include_characters(queryset, value):
+def has_any_character(character_list: List[models.Character]) -> Exists:
+    return Exists(
+        models.ScriptCharacter.objects.filter(
+            script_version=OuterRef("pk"), character__in=character_list
+        )
+    )
+
+
+def split_characters(value) -> Tuple[List[models.Character], List[str]]:
+    """
+    Resolve a separated list of character names into the known Characters, and the
+    ids of any that aren't in the catalog such as homebrew characters.
+    """
+    catalog = characters.get_catalog()
+    character_list = []
+    unknown_ids = []
     for character in re.split(",|;|:|/", value):
         character = character.strip()
         if character in ",;:/":
             continue
-        queryset = queryset.filter(content__contains=[{"id": name_to_id(character)}])
+        character_id = name_to_id(character)
+        known = catalog.get(character_id)
+        if known:
+            character_list.append(known)
+        else:
+            unknown_ids.append(character_id)
+    return character_list, unknown_ids
+
+
+def has_character_id(character_id: str) -> Q:
+    """
+    Match a character id in the script JSON, using the content GIN index. Only
+    needed for ids without a Character, which have no ScriptCharacter rows.
+    """
+    return Q(content__contains=[{"id": character_id}])
+
+
+def include_characters(queryset, value):
+    character_list, unknown_ids = split_characters(value)
+    for character in character_list:
+        queryset = queryset.filter(has_character(character))
+    for character_id in unknown_ids:
+        queryset = queryset.filter(has_character_id(character_id))
     return queryset
 
 
 def exclude_characters(queryset, value):
-    for character in re.split(",|;|:|/", value):
-        character = character.strip()
-        if character in ",;:/":
-            continue
-        queryset = queryset.exclude(content__contains=[{"id": name_to_id(character)}])
+    character_list, unknown_ids = split_characters(value)
+    if character_list:
+        queryset = queryset.exclude(has_any_character(character_list))
+    for character_id in unknown_ids:
+        queryset = queryset.exclude(has_character_id(character_id))
     return queryset
 
 def name_to_id(name:str):
@@ -60,6 +130,9 @@ class ScriptVersionFilter(filters.FilterSet):
     )
     author = django_filters.filters.CharFilter(method="search_authors", label="Author")
     search = django_filters.filters.CharFilter(method="search_scripts", label="Search")
+    text = django_filters.filters.CharFilter(
+        method="search_text", label="Notes and characters"
+    )
     tags = django_filters.filters.ModelMultipleChoiceFilter(
         queryset=models.ScriptTag.objects.all().order_by("order"),
         widget=widgets.BadgePillSelectMultiple,
@@ -87,6 +160,8 @@ class ScriptVersionFilter(filters.FilterSet):
 
     def filter_my_scripts(self, queryset, name, value):
         if value:
+            if not self.request.user.is_authenticated:
+                return queryset.none()
             return queryset.filter(script__owner=self.request.user)
         return queryset
 
@@ -97,24 +172,34 @@ class ScriptVersionFilter(filters.FilterSet):
         return exclude_characters(queryset, value)
 
     def search_scripts(self, queryset, name, value):
-        queryset = annotate_queryset(queryset, "script__name", value)
+        queryset = trigram_search(queryset, "script__name", value)
         try:
             if "ordering" in self.request.query_params.keys():
-                return queryset.filter(similarity__gt=0.3)
+                return queryset
         except AttributeError:
             pass
 
-        return queryset.filter(similarity__gt=0).order_by("-similarity")
+        return queryset.order_by("-similarity")
 
     def search_authors(self, queryset, name, value):
-        queryset = annotate_queryset(queryset, "author", value)
+        queryset = trigram_search(queryset, "author", value)
+        try:
+            if "ordering" in self.request.query_params.keys():
+                return queryset
+        except AttributeError:
+            pass
+
+        return queryset.order_by("-similarity")
+
+    def search_text(self, queryset, name, value):
+        queryset = search.search(queryset, value)
         try:
             if "ordering" in self.request.query_params.keys():
-                return queryset.filter(similarity__gt=0.3)
+                return queryset
         except AttributeError:
             pass
 
-        return queryset.filter(similarity__gt=0.3).order_by("-similarity")
+        return queryset.order_by("-rank")
 
     def filter_edition(self, queryset, _, value):
         return queryset.filter(edition__lte=value)
@@ -135,20 +220,32 @@ class ScriptVersionFilter(filters.FilterSet):
 
 
 class FavouriteScriptVersionFilter(ScriptVersionFilter):
+    # The form is the same for every user; these are only shown to logged in users
+    # once the page has loaded their state.
     favourites = django_filters.filters.BooleanFilter(
-        method="display_favourites", widget=forms.CheckboxInput, label="Favourites"
+        method="display_favourites",
+        widget=forms.CheckboxInput(attrs={"data-auth": "user"}),
+        label="Favourites",
     )
     my_scripts = django_filters.filters.BooleanFilter(
         method="filter_my_scripts",
-        widget=forms.CheckboxInput,
+        widget=forms.CheckboxInput(attrs={"data-auth": "user"}),
         label="My Scripts",
     )
 
+    # Filters whose results depend on the current user.
+    user_filters = ("favourites", "my_scripts")
+
     def display_favourites(self, queryset, name, value):
         if value:
+            if not self.request.user.is_authenticated:
+                return queryset.none()
             return queryset.filter(favourites__user=self.request.user)
         return queryset
 
+    def is_user_specific(self) -> bool:
+        return any(self.data.get(name) for name in self.user_filters)
+
     class Meta:
         model = models.ScriptVersion
         fields = [
@@ -3,9 +3,8 @@ import json as js
 from django import forms
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
-from versionfield import Version
 
-from scripts import constants, models, script_json, validators, widgets
+from scripts import constants, duplicates, models, script_json, validators, widgets
 
 
 class JSONError(Exception):
@@ -49,6 +48,8 @@ class ScriptForm(forms.Form):
 
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop("user")
+        # Populated during clean() so the upload view can reuse it.
+        self.analysis = None
         super(ScriptForm, self).__init__(*args, **kwargs)
 
     def clean(self):
@@ -92,7 +93,8 @@ class ScriptForm(forms.Form):
             #             f"Entered Name {entered_name} does not match script JSON name {json_name}"
             #         )
 
-            validators.validate_json(json)
+            self.analysis = script_json.analyse_script(json)
+            validators.validate_json(json, self.analysis)
 
             # script_name = json_name if json_name else entered_name
             script_name = entered_name
@@ -105,12 +107,11 @@ class ScriptForm(forms.Form):
                 )
 
             new_version = cleaned_data["version"]
-            for script_version in script.versions.all():
-                if Version(new_version) == script_version.version:
-                    if script_version.content != json:
-                        raise ValidationError(
-                            f"Version {new_version} already exists. You cannot upload a different script with the same version number."
-                        )
+            script_version = script.versions.filter(version=new_version).first()
+            if script_version and not duplicates.same_content(script_version, json):
+                raise ValidationError(
+                    f"Version {new_version} already exists. You cannot upload a different script with the same version number."
+                )
 
         except models.Script.DoesNotExist:
             pass
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from scripts import minhash, models
+
+
+class Command(BaseCommand):
+    help = "Compute the MinHash signatures and LSH bands used for approximate similarity."
+
+    def handle(self, *args, **options):
+        count = 0
+        queryset = models.ScriptVersion.objects.only("pk").order_by("pk")
+        for script_version in queryset.iterator(chunk_size=500):
+            minhash.update_signature(script_version)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Computed MinHash signatures for {count} script versions")
+        )
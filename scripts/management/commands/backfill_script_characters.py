@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scripts import characters, models
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ScriptCharacter membership table from script version content."
+
+    def handle(self, *args, **options):
+        count = 0
+        queryset = models.ScriptVersion.objects.only("pk", "content").order_by("pk")
+        for script_version in queryset.iterator(chunk_size=500):
+            with transaction.atomic():
+                characters.update_script_characters(script_version)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt character membership for {count} script versions")
+        )
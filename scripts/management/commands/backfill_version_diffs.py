@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scripts import characters, diffs, models
+
+
+class Command(BaseCommand):
+    help = "Rebuild the diffs between consecutive versions of every script."
+
+    def handle(self, *args, **options):
+        catalog = characters.get_catalog()
+        count = 0
+        previous = None
+        queryset = models.ScriptVersion.objects.only(
+            "pk", "script", "version", "content"
+        ).order_by("script", "version")
+        for script_version in queryset.iterator(chunk_size=500):
+            if previous and previous.script_id != script_version.script_id:
+                previous = None
+            if diffs.write_version_diff(script_version, previous, catalog):
+                count += 1
+            previous = script_version
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} script version diffs"))
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts import models, similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the indexed similar scripts lookup against a full fingerprint scan for "
+        "a sample of latest scripts, and fail if their results differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=50,
+            help="Number of latest scripts to look up similar scripts for.",
+        )
+
+    def time(self, function, script_version):
+        start = time.perf_counter()
+        result = function(script_version)
+        return result, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        latest = models.ScriptVersion.objects.filter(latest=True)
+        script_versions = latest.order_by("?")[: options["samples"]]
+        scan_time = 0.0
+        indexed_time = 0.0
+        mismatches = []
+        for script_version in script_versions:
+            expected, elapsed = self.time(
+                similarity.scan_similar_scripts, script_version
+            )
+            scan_time += elapsed
+            result, elapsed = self.time(similarity.get_similar_scripts, script_version)
+            indexed_time += elapsed
+            if result != expected:
+                mismatches.append(script_version)
+
+        count = len(script_versions)
+        if count == 0:
+            raise CommandError("There are no latest scripts to benchmark")
+
+        self.stdout.write(
+            f"{count} lookups over {latest.count()} latest scripts\n"
+            f"full scan: {scan_time / count * 1000:.1f}ms per lookup\n"
+            f"indexed:   {indexed_time / count * 1000:.1f}ms per lookup"
+        )
+        if mismatches:
+            raise CommandError(
+                "Results differ for: " + ", ".join(str(sv) for sv in mismatches)
+            )
+        self.stdout.write(self.style.SUCCESS("Indexed results match the full scan"))
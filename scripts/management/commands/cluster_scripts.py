@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts import clustering
+
+
+class Command(BaseCommand):
+    help = (
+        "Group the latest scripts into clusters of similar scripts, each stored as a "
+        "family tree along its most similar links. Requires NumPy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold",
+            type=int,
+            default=80,
+            help="Minimum similarity percentage linking two scripts into a cluster.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=clustering.DEFAULT_CHUNK_SIZE,
+            help="Scripts compared at a time; lower it to use less memory.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError(
+                "cluster_scripts requires NumPy, poetry install --extras clustering"
+            )
+        if not 0 < options["threshold"] <= 100:
+            raise CommandError("--threshold must be between 1 and 100")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        start = time.perf_counter()
+        clusters = clustering.build_clusters(
+            options["threshold"], options["chunk_size"]
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {len(clusters)} clusters of "
+                f"{sum(cluster.size for cluster in clusters)} scripts in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts import minhash, models, similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the recall@k and speed of approximate MinHash similarity against the "
+        "exact similarity for a sample of latest scripts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=100,
+            help="Number of latest scripts to look up similar scripts for.",
+        )
+        parser.add_argument(
+            "-k",
+            type=int,
+            default=similarity.SIMILAR_SCRIPTS_TO_DISPLAY,
+            help="Number of similar scripts to compare.",
+        )
+        parser.add_argument(
+            "--min-bands",
+            type=int,
+            nargs="+",
+            default=[1, 2, 3],
+            help="Minimum shared bands for approximate candidates; each is reported.",
+        )
+
+    def get_pks(self, results):
+        return {
+            script["scriptPK"]
+            for scripts in results.values()
+            for script in scripts
+            if script["value"] > 0
+        }
+
+    def handle(self, *args, **options):
+        k = options["k"]
+        samples = list(
+            models.ScriptVersion.objects.filter(latest=True, minhash__isnull=False)
+            .order_by("?")[: options["samples"]]
+        )
+        if not samples:
+            raise CommandError(
+                "There are no latest scripts with MinHash signatures, run backfill_minhash"
+            )
+
+        exact = {}
+        start = time.perf_counter()
+        for script_version in samples:
+            exact[script_version.pk] = self.get_pks(
+                similarity.get_similar_scripts(script_version, k)
+            )
+        exact_time = (time.perf_counter() - start) / len(samples)
+        self.stdout.write(
+            f"{len(samples)} samples, {minhash.ROWS_PER_BAND} rows per band\n"
+            f"exact: {exact_time * 1000:.1f}ms per lookup"
+        )
+
+        for min_bands in options["min_bands"]:
+            found = 0
+            expected = 0
+            candidates = 0
+            start = time.perf_counter()
+            for script_version in samples:
+                approx = self.get_pks(
+                    similarity.get_similar_scripts(
+                        script_version, k, mode="approx", min_bands=min_bands
+                    )
+                )
+                found += len(approx & exact[script_version.pk])
+                expected += len(exact[script_version.pk])
+            elapsed = (time.perf_counter() - start) / len(samples)
+            for script_version in samples:
+                candidates += minhash.get_candidates(script_version, min_bands).count()
+
+            recall = found / expected if expected else 1.0
+            self.stdout.write(
+                f"approx, min bands {min_bands}: recall@{k} {recall:.3f}, "
+                f"{candidates / len(samples):.0f} candidates, "
+                f"{elapsed * 1000:.1f}ms per lookup"
+            )
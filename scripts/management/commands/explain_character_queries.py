@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from scripts import characters, filters, models
+
+# A correlated subquery run once per script version, rather than a join.
+SUBPLAN = re.compile(r"\bSubPlan\b")
+
+# Below this many script versions Postgres will often prefer a sequential scan
+# even when a usable index exists, so the chosen plans are not representative.
+REALISTIC_CORPUS_SIZE = 5000
+
+
+def index_scan(index: str) -> re.Pattern:
+    return re.compile(
+        rf"(?:Index Scan|Index Only Scan|Bitmap Index Scan) (?:using|on) {index}\b"
+    )
+
+
+def uses_index(plan: str, indexes: List[str]) -> bool:
+    return any(index_scan(index).search(plan) for index in indexes)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the character include/exclude/statistics queries, and fail "
+        "if they can't use their index or check every script version one by one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--character",
+            default="imp",
+            help="Character id to build the queries with.",
+        )
+        parser.add_argument(
+            "--homebrew",
+            default="homebrew_character",
+            help="Id without a Character, matched in the script JSON.",
+        )
+
+    def get_queries(
+        self, character: models.Character, homebrew: str
+    ) -> Dict[str, Tuple[QuerySet, List[str]]]:
+        """
+        The queries to check, each with the indexes that can serve it.
+        """
+        queryset = models.ScriptVersion.objects.filter(latest=True)
+        membership_indexes = [
+            index.name for index in models.ScriptCharacter._meta.indexes
+        ] + [constraint.name for constraint in models.ScriptCharacter._meta.constraints]
+        content_indexes = [
+            index.name
+            for index in models.ScriptVersion._meta.indexes
+            if index.fields == ["content"]
+        ]
+        return {
+            "include": (
+                filters.include_characters(queryset, character.character_id),
+                membership_indexes,
+            ),
+            "exclude": (
+                filters.exclude_characters(queryset, character.character_id),
+                membership_indexes,
+            ),
+            "statistics": (
+                queryset.filter(filters.has_character(character)),
+                membership_indexes,
+            ),
+            "include homebrew": (
+                filters.include_characters(queryset, homebrew),
+                content_indexes,
+            ),
+        }
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans can only be checked against Postgres.")
+
+        character = characters.get_character(options["character"])
+        if character is None:
+            raise CommandError(f"Unknown character {options['character']}")
+        if characters.get_character(options["homebrew"]):
+            raise CommandError(f"{options['homebrew']} is a known character")
+
+        corpus_size = models.ScriptVersion.objects.count()
+        if corpus_size < REALISTIC_CORPUS_SIZE:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Only {corpus_size} script versions; the chosen plans may not "
+                    "match production."
+                )
+            )
+
+        failures = []
+        queries = self.get_queries(character, options["homebrew"])
+        for name, (queryset, indexes) in queries.items():
+            # A sequential scan can be the best plan for a common character, so
+            # show the chosen plan but only require it to be a join.
+            plan = queryset.explain()
+            self.stdout.write(f"== {name}\n{plan}\n")
+            if SUBPLAN.search(plan):
+                failures.append(f"{name} runs a subquery per script version")
+
+            # With sequential scans disabled, the query has to be able to use one
+            # of its indexes.
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                forced_plan = queryset.explain()
+            if not uses_index(forced_plan, indexes):
+                self.stdout.write(f"== {name} without sequential scans\n{forced_plan}\n")
+                failures.append(f"{name} can't use {' or '.join(indexes)}")
+
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All character queries can use an index"))
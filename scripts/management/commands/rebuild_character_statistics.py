@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from scripts import statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the precomputed character statistics and co-occurrences from the "
+        "script versions and report any counts that had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report differences without replacing the stored statistics.",
+        )
+
+    def report(self, name, fields, differences, dry_run):
+        for key, (stored, live) in sorted(differences.items(), key=str):
+            description = " ".join(f"{field}={value}" for field, value in zip(fields, key))
+            self.stdout.write(f"{description}: stored {stored}, live {live}")
+
+        if not differences:
+            self.stdout.write(self.style.SUCCESS(f"{name} are up to date"))
+        elif dry_run:
+            self.stdout.write(
+                self.style.WARNING(f"{len(differences)} {name.lower()} are out of date")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Corrected {len(differences)} {name.lower()}")
+            )
+
+    def handle(self, *args, **options):
+        fix = not options["dry_run"]
+        self.report(
+            "Character statistics",
+            ["character", "latest", "edition", "script_type"],
+            statistics.rebuild_character_statistics(fix=fix),
+            options["dry_run"],
+        )
+        self.report(
+            "Co-occurrences",
+            ["character", "partner"],
+            statistics.rebuild_cooccurrences(fix=fix),
+            options["dry_run"],
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from scripts import models, similarity
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored similar scripts of every latest script version."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help=(
+                "Only store the lists cleared since the last run by uploads, edits "
+                "and deletions. Run this regularly."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        # Versions that are no longer latest shouldn't have stored lists.
+        models.SimilarScript.objects.filter(script_version__latest=False).delete()
+
+        count = 0
+        queryset = models.ScriptVersion.objects.filter(latest=True).order_by("pk")
+        if options["missing"]:
+            queryset = queryset.exclude(
+                pk__in=models.SimilarScript.objects.values("script_version")
+            )
+        for script_version in queryset.iterator(chunk_size=500):
+            similarity.store_similar_scripts(script_version)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Stored similar scripts for {count} script versions")
+        )
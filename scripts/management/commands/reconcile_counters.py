@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from scripts import counters
+
+
+class Command(BaseCommand):
+    help = "Check the stored ScriptVersion vote/favourite/comment/tag counters and correct any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report out of date counters without correcting them.",
+        )
+
+    def handle(self, *args, **options):
+        stale = counters.reconcile_counters(fix=not options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"{stale} script versions have out of date counters")
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Corrected counters on {stale} script versions")
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from scripts import duplicates
+
+
+class Command(BaseCommand):
+    help = "List groups of latest scripts with exactly the same characters."
+
+    def handle(self, *args, **options):
+        clusters = duplicates.duplicate_clusters()
+        for content_hash, script_versions in clusters.items():
+            self.stdout.write(f"{content_hash[:12]}:")
+            for script_version in script_versions:
+                self.stdout.write(
+                    f"  {script_version.script.pk}. {script_version.script.name} "
+                    f"v{script_version.version} by {script_version.author or 'unknown'}"
+                )
+
+        if clusters:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Found {len(clusters)} duplicated character lists"
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("No duplicate scripts"))
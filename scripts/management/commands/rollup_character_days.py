@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scripts import statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up per-character upload counts for each complete day since the last "
+        "run, and the last week again, for the character time series."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Recompute every day from this date (YYYY-MM-DD) onwards, e.g. after "
+            "older script versions have been deleted.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError(f"Invalid date {options['since']}")
+
+        rows = statistics.rollup_days(since)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} daily counts"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from scripts import characters, models, search
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the stored full text search vectors, e.g. after character names or "
+        "abilities have changed."
+    )
+
+    def handle(self, *args, **options):
+        catalog = characters.get_catalog()
+        count = 0
+        queryset = models.ScriptVersion.objects.select_related("script").order_by("pk")
+        for script_version in queryset.iterator(chunk_size=500):
+            search.update_search_vector(script_version, catalog)
+            count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt search vectors for {count} script versions")
+        )
@@ -2,19 +2,19 @@
 
 from django.db import migrations, models
 
-from scripts.views import count_character
-from scripts.models import CharacterType
+from scripts.script_json import analyse_script
 
 
 def update_existing_script_number_fields(apps, schema_editor):
     ScriptVersion = apps.get_model("scripts", "scriptversion")
     for script in ScriptVersion.objects.all():
-        script.num_townsfolk = count_character(script.content, CharacterType.TOWNSFOLK)
-        script.num_outsiders = count_character(script.content, CharacterType.OUTSIDER)
-        script.num_minions = count_character(script.content, CharacterType.MINION)
-        script.num_demons = count_character(script.content, CharacterType.DEMON)
-        script.num_fabled = count_character(script.content, CharacterType.FABLED)
-        script.num_travellers = count_character(script.content, CharacterType.TRAVELLER)
+        analysis = analyse_script(script.content)
+        script.num_townsfolk = analysis.num_townsfolk
+        script.num_outsiders = analysis.num_outsiders
+        script.num_minions = analysis.num_minions
+        script.num_demons = analysis.num_demons
+        script.num_fabled = analysis.num_fabled
+        script.num_travellers = analysis.num_travellers
         script.save()
 
 
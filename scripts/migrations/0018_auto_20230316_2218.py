@@ -1,13 +1,13 @@
 # Generated by Django 3.2.18 on 2023-03-16 22:18
 
 from django.db import migrations, models
-from scripts.views import calculate_edition
+from scripts.script_json import analyse_script
 
 
 def update_existing_scripts(apps, schema_editor):
     ScriptVersion = apps.get_model("scripts", "scriptversion")
     for script in ScriptVersion.objects.all():
-        script.edition = calculate_edition(script.content)
+        script.edition = analyse_script(script.content).edition
         script.save()
 
 
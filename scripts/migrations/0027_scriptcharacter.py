@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_script_characters(apps, schema_editor):
+    Character = apps.get_model("scripts", "character")
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    ScriptCharacter = apps.get_model("scripts", "scriptcharacter")
+
+    character_pks = dict(Character.objects.values_list("character_id", "pk"))
+    batch = []
+    for script_version in ScriptVersion.objects.only("pk", "content").iterator():
+        pks = {character_pks.get(item.get("id")) for item in script_version.content}
+        pks.discard(None)
+        batch.extend(
+            ScriptCharacter(script_version_id=script_version.pk, character_id=pk)
+            for pk in pks
+        )
+        if len(batch) >= 5000:
+            ScriptCharacter.objects.bulk_create(batch)
+            batch = []
+    ScriptCharacter.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0026_alter_scripttag_style'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScriptCharacter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='script_versions', to='scripts.character')),
+                ('script_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='characters', to='scripts.scriptversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['character', 'script_version'], name='scripts_scr_charact_1160e1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scriptcharacter',
+            constraint=models.UniqueConstraint(fields=('script_version', 'character'), name='script_character'),
+        ),
+        migrations.RunPython(populate_script_characters, migrations.RunPython.noop),
+    ]
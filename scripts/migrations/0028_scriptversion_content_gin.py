@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:59
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0027_scriptcharacter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['content'], name='scriptversion_content_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:00
+
+import scripts.fields
+from django.db import migrations, models
+
+
+def assign_bit_positions_and_fingerprints(apps, schema_editor):
+    Character = apps.get_model("scripts", "character")
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+
+    bits = {}
+    for position, character in enumerate(Character.objects.order_by("pk")):
+        character.bit_position = position
+        character.save(update_fields=["bit_position"])
+        bits[character.character_id] = 1 << position
+
+    for script_version in ScriptVersion.objects.only("pk", "content").iterator():
+        fingerprint = 0
+        for item in script_version.content:
+            fingerprint |= bits.get(item.get("id"), 0)
+        script_version.fingerprint = fingerprint
+        script_version.save(update_fields=["fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0028_scriptversion_content_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='bit_position',
+            field=models.IntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='scriptversion',
+            name='fingerprint',
+            field=scripts.fields.BitStringField(default=0, length=512),
+        ),
+        migrations.RunPython(
+            assign_bit_positions_and_fingerprints, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field, outer_field="pk"):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    Vote = apps.get_model("scripts", "vote")
+    Favourite = apps.get_model("scripts", "favourite")
+    Comment = apps.get_model("scripts", "comment")
+    ScriptVersion.objects.update(
+        score=count_related(Vote, "script"),
+        num_favs=count_related(Favourite, "script"),
+        num_comments=count_related(Comment, "script", "script"),
+        num_tags=count_related(ScriptVersion.tags.through, "scriptversion"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0029_character_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scriptversion',
+            name='num_comments',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scriptversion',
+            name='num_favs',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scriptversion',
+            name='num_tags',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scriptversion',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=models.Index(fields=['score'], name='scripts_scr_score_86f9e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=models.Index(fields=['num_favs'], name='scripts_scr_num_fav_e4ae2b_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
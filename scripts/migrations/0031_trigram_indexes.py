@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:03
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0030_scriptversion_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='script',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='script_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['author'], name='scriptversion_author_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
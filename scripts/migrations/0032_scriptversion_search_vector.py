@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from scripts.search import build_search_vector, get_character_text
+
+
+def populate_search_vectors(apps, schema_editor):
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    Character = apps.get_model("scripts", "character")
+    catalog = {
+        character.character_id: character for character in Character.objects.all()
+    }
+    queryset = ScriptVersion.objects.select_related("script").order_by("pk")
+    for script_version in queryset.iterator(chunk_size=500):
+        ScriptVersion.objects.filter(pk=script_version.pk).update(
+            search_vector=build_search_vector(
+                script_version.script.name,
+                script_version.author,
+                script_version.notes,
+                get_character_text(script_version.content, catalog),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0031_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scriptversion',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='scriptversion_search_gin'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_character_statistics(apps, schema_editor):
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    ScriptCharacter = apps.get_model("scripts", "scriptcharacter")
+    CharacterStatistic = apps.get_model("scripts", "characterstatistic")
+
+    totals = (
+        ScriptVersion.objects.values_list("latest", "edition", "script_type")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    memberships = (
+        ScriptCharacter.objects.values_list(
+            "character",
+            "script_version__latest",
+            "script_version__edition",
+            "script_version__script_type",
+        )
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    rows = [(None, *row) for row in totals] + list(memberships)
+    CharacterStatistic.objects.bulk_create(
+        [
+            CharacterStatistic(
+                character_id=character,
+                latest=latest,
+                edition=edition,
+                script_type=script_type,
+                count=count,
+            )
+            for character, latest, edition, script_type, count in rows
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0032_scriptversion_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterStatistic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latest', models.BooleanField()),
+                ('edition', models.IntegerField(choices=[(0, 'Base'), (1, 'Kickstarter'), (2, 'clocktower.online'), (3, 'All')])),
+                ('script_type', models.CharField(choices=[('Teensyville', 'Teensyville'), ('Full', 'Full')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('character', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='scripts.character')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='characterstatistic',
+            constraint=models.UniqueConstraint(fields=('character', 'latest', 'edition', 'script_type'), name='character_statistic'),
+        ),
+        migrations.AddConstraint(
+            model_name='characterstatistic',
+            constraint=models.UniqueConstraint(condition=models.Q(('character', None)), fields=('latest', 'edition', 'script_type'), name='character_statistic_total'),
+        ),
+        migrations.RunPython(
+            populate_character_statistics, migrations.RunPython.noop
+        ),
+    ]
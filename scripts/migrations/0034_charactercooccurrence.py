@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_cooccurrences(apps, schema_editor):
+    ScriptCharacter = apps.get_model("scripts", "scriptcharacter")
+    CharacterCooccurrence = apps.get_model("scripts", "charactercooccurrence")
+    pairs = (
+        ScriptCharacter.objects.filter(script_version__latest=True)
+        .values_list("character", "script_version__characters__character")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    CharacterCooccurrence.objects.bulk_create(
+        [
+            CharacterCooccurrence(
+                character_id=character, partner_id=partner, count=count
+            )
+            for character, partner, count in pairs.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0033_characterstatistic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cooccurrences', to='scripts.character')),
+                ('partner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scripts.character')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='charactercooccurrence',
+            constraint=models.UniqueConstraint(fields=('character', 'partner'), name='character_cooccurrence'),
+        ),
+        migrations.RunPython(populate_cooccurrences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0034_charactercooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('character', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_counts', to='scripts.character')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='scripts_cha_day_214aef_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='characterdailycount',
+            constraint=models.UniqueConstraint(fields=('character', 'day'), name='character_daily_count'),
+        ),
+        migrations.AddConstraint(
+            model_name='characterdailycount',
+            constraint=models.UniqueConstraint(condition=models.Q(('character', None)), fields=('day',), name='character_daily_count_total'),
+        ),
+    ]
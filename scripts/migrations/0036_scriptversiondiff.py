@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:11
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0035_characterdailycount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScriptVersionDiff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=30), default=list, size=None)),
+                ('removed', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=30), default=list, size=None)),
+                ('previous_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scripts.scriptversion')),
+                ('script_version', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='diff', to='scripts.scriptversion')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CharacterChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added', models.BooleanField()),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='scripts.character')),
+                ('diff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='scripts.scriptversiondiff')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['character', 'added'], name='scripts_cha_charact_9b389b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:13
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0036_scriptversiondiff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scriptversion',
+            name='minhash',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, editable=False, null=True, size=64),
+        ),
+        migrations.CreateModel(
+            name='ScriptVersionBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.SmallIntegerField()),
+                ('hash', models.BigIntegerField()),
+                ('script_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='scripts.scriptversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'hash'], name='scripts_scr_band_655802_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0037_minhash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarScript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('script_type', models.CharField(choices=[('Teensyville', 'Teensyville'), ('Full', 'Full')], max_length=20)),
+                ('rank', models.SmallIntegerField()),
+                ('value', models.IntegerField()),
+                ('script_version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_scripts', to='scripts.scriptversion')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='scripts.scriptversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['similar'], name='scripts_sim_similar_827b59_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarscript',
+            constraint=models.UniqueConstraint(fields=('script_version', 'script_type', 'rank'), name='similar_script'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+from scripts.duplicates import content_hash
+
+
+def populate_content_hashes(apps, schema_editor):
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    queryset = ScriptVersion.objects.order_by("pk").only("pk", "content")
+    for script_version in queryset.iterator(chunk_size=500):
+        ScriptVersion.objects.filter(pk=script_version.pk).update(
+            content_hash=content_hash(script_version.content)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0039_scriptcluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scriptversion',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='scriptversion',
+            index=models.Index(fields=['content_hash'], name='scripts_scr_content_5e3d2e_idx'),
+        ),
+        migrations.RunPython(populate_content_hashes, migrations.RunPython.noop),
+    ]
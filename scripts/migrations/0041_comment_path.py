@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+from scripts.constants import COMMENT_PATH_DIGITS
+
+
+def populate_comment_paths(apps, schema_editor):
+    Comment = apps.get_model("scripts", "comment")
+    parents = dict(Comment.objects.values_list("pk", "parent_id"))
+    paths = {}
+
+    def get_path(pk):
+        if pk not in paths:
+            parent = parents[pk]
+            prefix = get_path(parent) if parent is not None else ""
+            paths[pk] = prefix + f"{pk:0{COMMENT_PATH_DIGITS}d}/"
+        return paths[pk]
+
+    Comment.objects.bulk_update(
+        [Comment(pk=pk, path=get_path(pk)) for pk in parents], ["path"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0040_scriptversion_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['script', 'path'], name='scripts_com_script__823813_idx'),
+        ),
+        migrations.RunPython(populate_comment_paths, migrations.RunPython.noop),
+    ]
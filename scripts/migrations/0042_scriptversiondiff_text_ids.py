@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:38
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0041_comment_path'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scriptversiondiff',
+            name='added',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+        migrations.AlterField(
+            model_name='scriptversiondiff',
+            name='removed',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), default=list, size=None),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:41
+
+from django.db import migrations
+
+from scripts.diffs import diff_content
+
+
+def populate_version_diffs(apps, schema_editor):
+    Character = apps.get_model("scripts", "character")
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    ScriptVersionDiff = apps.get_model("scripts", "scriptversiondiff")
+    CharacterChange = apps.get_model("scripts", "characterchange")
+
+    character_pks = dict(Character.objects.values_list("character_id", "pk"))
+    # Versions uploaded since 0036 already have their diffs.
+    diffed = set(ScriptVersionDiff.objects.values_list("script_version", flat=True))
+    previous = None
+    queryset = ScriptVersion.objects.only("pk", "script", "version", "content").order_by(
+        "script", "version"
+    )
+    for script_version in queryset.iterator(chunk_size=500):
+        if previous and previous.script_id != script_version.script_id:
+            previous = None
+        if previous and script_version.pk not in diffed:
+            added, removed = diff_content(previous.content, script_version.content)
+            diff = ScriptVersionDiff.objects.create(
+                script_version_id=script_version.pk,
+                previous_version_id=previous.pk,
+                added=added,
+                removed=removed,
+            )
+            CharacterChange.objects.bulk_create(
+                [
+                    CharacterChange(
+                        diff=diff, character_id=character_pks[id], added=is_addition
+                    )
+                    for ids, is_addition in ((added, True), (removed, False))
+                    for id in ids
+                    if id in character_pks
+                ]
+            )
+        previous = script_version
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0042_scriptversiondiff_text_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_version_diffs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:51
+
+import scripts.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0043_populate_version_diffs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scriptversion',
+            name='fingerprint',
+            field=scripts.fields.BitStringField(default=0, editable=False, length=512),
+        ),
+    ]
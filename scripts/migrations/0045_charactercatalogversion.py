@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    CharacterCatalogVersion = apps.get_model("scripts", "charactercatalogversion")
+    CharacterCatalogVersion.objects.create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0044_scriptversion_fingerprint_not_editable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CharacterCatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0045_charactercatalogversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scriptversion',
+            name='num_comments',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='scriptversion',
+            name='num_favs',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='scriptversion',
+            name='num_tags',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='scriptversion',
+            name='score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
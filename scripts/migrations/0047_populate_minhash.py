@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:40
+
+from django.db import migrations
+
+from scripts.minhash import get_bands, get_signature
+
+
+def populate_minhash(apps, schema_editor):
+    ScriptVersion = apps.get_model("scripts", "scriptversion")
+    ScriptCharacter = apps.get_model("scripts", "scriptcharacter")
+    ScriptVersionBand = apps.get_model("scripts", "scriptversionband")
+
+    # Versions uploaded since 0037 already have their signatures.
+    queryset = ScriptVersion.objects.filter(minhash__isnull=True).only("pk").order_by(
+        "pk"
+    )
+    for script_version in queryset.iterator(chunk_size=500):
+        signature = get_signature(
+            ScriptCharacter.objects.filter(script_version=script_version).values_list(
+                "character", flat=True
+            )
+        )
+        if signature is None:
+            continue
+        ScriptVersion.objects.filter(pk=script_version.pk).update(minhash=signature)
+        ScriptVersionBand.objects.filter(script_version=script_version).delete()
+        ScriptVersionBand.objects.bulk_create(
+            [
+                ScriptVersionBand(script_version=script_version, band=band, hash=hash)
+                for band, hash in get_bands(signature)
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scripts', '0046_scriptversion_counters_not_editable'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_minhash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,91 @@
+import hashlib
+import random
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from scripts import constants, models
+
+# Hash functions h(x) = (a * x + b) mod PRIME over character primary keys. The seed
+# is fixed so that signatures stay comparable between processes and deployments.
+PRIME = (1 << 61) - 1
+_random = random.Random(20240601)
+HASH_COEFFICIENTS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(constants.MINHASH_PERMUTATIONS)
+]
+ROWS_PER_BAND = constants.MINHASH_PERMUTATIONS // constants.MINHASH_BANDS
+
+
+def get_signature(character_pks: Iterable[int]) -> Optional[List[int]]:
+    """
+    MinHash signature of a set of characters, or None if it's empty.
+    """
+    character_pks = set(character_pks)
+    if not character_pks:
+        return None
+    return [
+        min((a * pk + b) % PRIME for pk in character_pks) for a, b in HASH_COEFFICIENTS
+    ]
+
+
+def get_bands(signature: List[int]) -> List[Tuple[int, int]]:
+    """
+    (band, hash) pairs for a signature, hashing each band's rows to a signed 64 bit
+    integer.
+    """
+    bands = []
+    for band in range(constants.MINHASH_BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            ",".join(str(row) for row in rows).encode(), digest_size=8
+        ).digest()
+        bands.append((band, int.from_bytes(digest, "big", signed=True)))
+    return bands
+
+
+def update_signature(script_version: models.ScriptVersion) -> None:
+    """
+    Store the MinHash signature and LSH bands of a script version from its
+    ScriptCharacter rows.
+    """
+    signature = get_signature(
+        script_version.characters.values_list("character", flat=True)
+    )
+    with transaction.atomic():
+        models.ScriptVersion.objects.filter(pk=script_version.pk).update(
+            minhash=signature
+        )
+        script_version.minhash = signature
+        models.ScriptVersionBand.objects.filter(script_version=script_version).delete()
+        if signature:
+            models.ScriptVersionBand.objects.bulk_create(
+                [
+                    models.ScriptVersionBand(
+                        script_version=script_version, band=band, hash=hash
+                    )
+                    for band, hash in get_bands(signature)
+                ]
+            )
+
+
+def get_candidates(script_version: models.ScriptVersion, min_bands: int = 1):
+    """
+    Primary keys of latest script versions sharing at least min_bands LSH bands with
+    the script version. Requiring more bands returns fewer, more similar candidates.
+    """
+    if not script_version.minhash:
+        return models.ScriptVersionBand.objects.none().values("script_version")
+
+    matching = Q()
+    for band, hash in get_bands(script_version.minhash):
+        matching |= Q(band=band, hash=hash)
+    return (
+        models.ScriptVersionBand.objects.filter(matching, script_version__latest=True)
+        .exclude(script_version=script_version)
+        .values("script_version")
+        .annotate(matches=Count("pk"))
+        .filter(matches__gte=min_bands)
+        .values("script_version")
+    )
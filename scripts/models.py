@@ -1,9 +1,13 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, models, transaction
 from versionfield import VersionField
 
 from scripts import constants
-from scripts.managers import ScriptViewManager, CollectionManager
+from scripts.fields import BitStringField
+from scripts.managers import CollectionManager, ScriptVersionQuerySet
 from typing import Dict
 
 
@@ -76,6 +80,11 @@ class Script(models.Model):
     def __str__(self):
         return f"{self.pk}. {self.name}"
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="script_name_trgm"),
+        ]
+
 
 def determine_script_location(instance, filename):
     return f"{instance.script.pk}/{instance.version}/{filename}"
@@ -107,13 +116,51 @@ class ScriptVersion(models.Model):
     num_fabled = models.IntegerField()
     num_travellers = models.IntegerField()
     edition = models.IntegerField(choices=Edition.choices, default=Edition.BASE)
+    # Bit n is set if the Character with bit_position n is in this script.
+    fingerprint = BitStringField(
+        length=constants.CHARACTER_FINGERPRINT_BITS, default=0, editable=False
+    )
+    # Hash of the sorted character ids, see scripts.duplicates.
+    content_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
+    # Counters maintained by scripts.counters as related objects change.
+    score = models.IntegerField(default=0, editable=False)
+    num_favs = models.IntegerField(default=0, editable=False)
+    # Comments belong to the Script, so every version stores the script's count.
+    num_comments = models.IntegerField(default=0, editable=False)
+    num_tags = models.IntegerField(default=0, editable=False)
+    # Maintained by scripts.search from the name, author, notes and characters.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # MinHash of the characters for approximate similarity, see scripts.minhash.
+    minhash = ArrayField(
+        models.BigIntegerField(),
+        size=constants.MINHASH_PERMUTATIONS,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
-    objects = ScriptViewManager()
+    objects = ScriptVersionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.pk}. {self.script.name} - v{self.version}"
 
     class Meta:
+        indexes = [
+            GinIndex(
+                fields=["content"],
+                opclasses=["jsonb_path_ops"],
+                name="scriptversion_content_gin",
+            ),
+            GinIndex(
+                fields=["author"],
+                opclasses=["gin_trgm_ops"],
+                name="scriptversion_author_trgm",
+            ),
+            GinIndex(fields=["search_vector"], name="scriptversion_search_gin"),
+            models.Index(fields=["score"]),
+            models.Index(fields=["num_favs"]),
+            models.Index(fields=["content_hash"]),
+        ]
         permissions = [
             (
                 "download_unsupported_json",
@@ -122,6 +169,258 @@ class ScriptVersion(models.Model):
         ]
 
 
+class ScriptVersionBand(models.Model):
+    """
+    Locality sensitive hashing band of a ScriptVersion's MinHash signature. Script
+    versions sharing a band hash are candidates for being similar.
+    """
+
+    script_version = models.ForeignKey(
+        ScriptVersion, on_delete=models.CASCADE, related_name="bands"
+    )
+    band = models.SmallIntegerField()
+    hash = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["band", "hash"])]
+
+    def __str__(self):
+        return f"{self.script_version} - band {self.band}"
+
+
+class SimilarScript(models.Model):
+    """
+    One of the most similar latest script versions of a type to a latest script
+    version, as shown on its page. Maintained by scripts.similarity.
+    """
+
+    script_version = models.ForeignKey(
+        ScriptVersion, on_delete=models.CASCADE, related_name="similar_scripts"
+    )
+    similar = models.ForeignKey(ScriptVersion, on_delete=models.CASCADE, related_name="+")
+    script_type = models.CharField(max_length=20, choices=ScriptTypes.choices)
+    rank = models.SmallIntegerField()
+    value = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["script_version", "script_type", "rank"],
+                name="similar_script",
+            )
+        ]
+        indexes = [models.Index(fields=["similar"])]
+
+    def __str__(self):
+        return f"{self.script_version} ~ {self.similar} ({self.value}%)"
+
+
+class ScriptCluster(models.Model):
+    """
+    A group of latest script versions linked by chains of similarity at or above a
+    threshold. Rebuilt as a whole by the cluster_scripts command.
+    """
+
+    threshold = models.IntegerField()
+    size = models.IntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cluster {self.pk} ({self.size} scripts, {self.threshold}%)"
+
+
+class ScriptClusterMember(models.Model):
+    """
+    Membership of a script version in a ScriptCluster. Parents form the cluster's
+    family tree, rooted at its oldest version, along its most similar links.
+    """
+
+    cluster = models.ForeignKey(
+        ScriptCluster, on_delete=models.CASCADE, related_name="members"
+    )
+    script_version = models.OneToOneField(
+        ScriptVersion, on_delete=models.CASCADE, related_name="cluster_member"
+    )
+    parent = models.ForeignKey(
+        ScriptVersion,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    value = models.IntegerField(null=True)
+
+    def __str__(self):
+        return f"{self.cluster} - {self.script_version}"
+
+
+class ScriptCharacter(models.Model):
+    """
+    Membership of a Character in a ScriptVersion, so that character filters and
+    statistics can use indexed joins rather than JSON containment checks.
+    """
+
+    script_version = models.ForeignKey(
+        ScriptVersion, on_delete=models.CASCADE, related_name="characters"
+    )
+    character = models.ForeignKey(
+        "Character", on_delete=models.CASCADE, related_name="script_versions"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["script_version", "character"], name="script_character"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["character", "script_version"]),
+        ]
+
+    def __str__(self):
+        return f"{self.script_version} - {self.character}"
+
+
+class CharacterStatistic(models.Model):
+    """
+    Precomputed number of script versions containing a Character, partitioned by
+    the version's latest flag, edition and script type. Rows without a character
+    hold the total number of script versions in that partition.
+
+    Maintained by scripts.statistics as script versions are uploaded, updated and
+    deleted.
+    """
+
+    character = models.ForeignKey(
+        "Character",
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        null=True,
+        blank=True,
+    )
+    latest = models.BooleanField()
+    edition = models.IntegerField(choices=Edition.choices)
+    script_type = models.CharField(max_length=20, choices=ScriptTypes.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["character", "latest", "edition", "script_type"],
+                name="character_statistic",
+            ),
+            models.UniqueConstraint(
+                fields=["latest", "edition", "script_type"],
+                condition=models.Q(character=None),
+                name="character_statistic_total",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.character or 'Total'} - {self.count}"
+
+
+class CharacterCooccurrence(models.Model):
+    """
+    Precomputed number of latest script versions containing both character and
+    partner. Each pair is stored in both directions, and a character paired with
+    itself counts the latest script versions containing it.
+
+    Maintained by scripts.statistics alongside CharacterStatistic.
+    """
+
+    character = models.ForeignKey(
+        "Character", on_delete=models.CASCADE, related_name="cooccurrences"
+    )
+    partner = models.ForeignKey("Character", on_delete=models.CASCADE, related_name="+")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["character", "partner"], name="character_cooccurrence"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.character} & {self.partner} - {self.count}"
+
+
+class CharacterDailyCount(models.Model):
+    """
+    Number of script versions uploaded on a day that contain a Character. Rows
+    without a character hold the total number of script versions uploaded that day.
+
+    Filled in by the rollup_character_days command, a day at a time.
+    """
+
+    character = models.ForeignKey(
+        "Character",
+        on_delete=models.CASCADE,
+        related_name="daily_counts",
+        null=True,
+        blank=True,
+    )
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["character", "day"], name="character_daily_count"
+            ),
+            models.UniqueConstraint(
+                fields=["day"],
+                condition=models.Q(character=None),
+                name="character_daily_count_total",
+            ),
+        ]
+        indexes = [models.Index(fields=["day"])]
+
+    def __str__(self):
+        return f"{self.day} {self.character or 'Total'} - {self.count}"
+
+
+class ScriptVersionDiff(models.Model):
+    """
+    The character ids added and removed by a script version relative to the version
+    before it, maintained by scripts.diffs.
+    """
+
+    script_version = models.OneToOneField(
+        ScriptVersion, on_delete=models.CASCADE, related_name="diff"
+    )
+    previous_version = models.ForeignKey(
+        ScriptVersion, on_delete=models.CASCADE, related_name="+"
+    )
+    added = ArrayField(models.TextField(), default=list)
+    removed = ArrayField(models.TextField(), default=list)
+
+    def __str__(self):
+        return f"{self.previous_version} -> {self.script_version}"
+
+
+class CharacterChange(models.Model):
+    """
+    A known Character added to or removed from a script by a ScriptVersionDiff, so
+    that churn can be aggregated in SQL.
+    """
+
+    diff = models.ForeignKey(
+        ScriptVersionDiff, on_delete=models.CASCADE, related_name="changes"
+    )
+    character = models.ForeignKey(
+        "Character", on_delete=models.CASCADE, related_name="changes"
+    )
+    added = models.BooleanField()
+
+    class Meta:
+        indexes = [models.Index(fields=["character", "added"])]
+
+    def __str__(self):
+        return f"{'+' if self.added else '-'}{self.character} ({self.diff})"
+
+
 class Comment(models.Model):
     """
     Model for commenting on scripts. Comments are only allowed by authenticated users.
@@ -140,7 +439,22 @@ class Comment(models.Model):
         on_delete=models.SET_NULL,
         related_name="children",
     )
-    # Might want to have a parent field so can have threads
+    # Primary keys from the top of the thread down to this comment, see
+    # scripts.comments.
+    path = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["script", "path"])]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.path:
+            # The path ends in this comment's own primary key, so it can only be
+            # filled in once the comment has been created.
+            self.path = (self.parent.path if self.parent else "") + (
+                f"{self.pk:0{constants.COMMENT_PATH_DIGITS}d}/"
+            )
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
 
 class Vote(models.Model):
@@ -260,10 +574,51 @@ class Character(BaseCharacterInfo):
     other_night_position = models.IntegerField(blank=True, null=True)
     image_url = models.CharField(blank=True, null=True, max_length=100)
     modifies_setup = models.BooleanField(default=False)
+    # Stable position of this character in ScriptVersion fingerprints.
+    bit_position = models.IntegerField(unique=True, blank=True, null=True)
 
     class Meta:
         permissions = [("update_characters", "Can update character information")]
 
+    def save(self, *args, **kwargs):
+        if self.bit_position is not None:
+            return super().save(*args, **kwargs)
+
+        # Take the lowest free position, retrying if a concurrent save claims it
+        # first. Once every position is taken, characters are saved without one and
+        # are only found through ScriptCharacter.
+        while True:
+            self.bit_position = self.free_bit_position()
+            if self.bit_position is None:
+                return super().save(*args, **kwargs)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                claimed = (
+                    Character.objects.filter(bit_position=self.bit_position)
+                    .exclude(pk=self.pk)
+                    .exists()
+                )
+                self.bit_position = None
+                if not claimed:
+                    raise
+
+    @staticmethod
+    def free_bit_position():
+        """
+        The lowest fingerprint position no Character has, or None if they all do.
+        """
+        taken = set(
+            Character.objects.filter(bit_position__isnull=False).values_list(
+                "bit_position", flat=True
+            )
+        )
+        for position in range(constants.CHARACTER_FINGERPRINT_BITS):
+            if position not in taken:
+                return position
+        return None
+
     def full_character_json(self) -> Dict:
         character_json = {}
         character_json["id"] = self.character_id
@@ -285,6 +640,19 @@ class Character(BaseCharacterInfo):
         return f"{self.character_name}"
 
 
+class CharacterCatalogVersion(models.Model):
+    """
+    Single row counting changes to the Character table, so that every process can
+    tell when its in-memory character catalog is out of date. See
+    scripts.characters.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Character catalog version {self.version}"
+
+
 class Translation(BaseCharacterInfo):
     """
     Model for translations of characters.
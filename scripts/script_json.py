@@ -1,3 +1,9 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from scripts import characters, models
+
+
 def get_author_from_json(json):
     return get_metadata_field_from_json(json, "author")
 
@@ -14,3 +20,88 @@ def get_metadata_field_from_json(json, field):
         if item.get("id", "") == "_meta":
             return item.get(field, None)
     return None
+
+
+@dataclass
+class ScriptAnalysis:
+    """
+    Everything we derive from a script JSON's character list, computed in one pass.
+    """
+
+    num_townsfolk: int = 0
+    num_outsiders: int = 0
+    num_minions: int = 0
+    num_demons: int = 0
+    num_fabled: int = 0
+    num_travellers: int = 0
+    edition: int = models.Edition.BASE
+    num_entries: int = 0
+    num_known: int = 0
+    homebrew: List[str] = field(default_factory=list)
+    fingerprint: int = 0
+
+    @property
+    def known_ratio(self) -> float:
+        if self.num_entries == 0:
+            return 0.0
+        return self.num_known / self.num_entries
+
+    @property
+    def contains_homebrew(self) -> bool:
+        return len(self.homebrew) > 0
+
+    def model_fields(self) -> Dict:
+        """
+        The ScriptVersion fields that are derived from the script content.
+        """
+        return {
+            "num_townsfolk": self.num_townsfolk,
+            "num_outsiders": self.num_outsiders,
+            "num_minions": self.num_minions,
+            "num_demons": self.num_demons,
+            "num_fabled": self.num_fabled,
+            "num_travellers": self.num_travellers,
+            "edition": self.edition,
+            "fingerprint": self.fingerprint,
+        }
+
+
+character_type_fields = {
+    models.CharacterType.TOWNSFOLK: "num_townsfolk",
+    models.CharacterType.OUTSIDER: "num_outsiders",
+    models.CharacterType.MINION: "num_minions",
+    models.CharacterType.DEMON: "num_demons",
+    models.CharacterType.FABLED: "num_fabled",
+    models.CharacterType.TRAVELLER: "num_travellers",
+}
+
+
+def analyse_script(json: List) -> ScriptAnalysis:
+    """
+    Resolve every character in a script JSON against the character catalog and
+    count them by type, along with the edition the script requires.
+    """
+    catalog = characters.get_catalog()
+    analysis = ScriptAnalysis()
+    for item in json:
+        character_id = item.get("id", "")
+        if character_id == "_meta":
+            continue
+
+        analysis.num_entries += 1
+        # Homebrew characters carry their full definition rather than just an id.
+        if len(item) > 1:
+            analysis.homebrew.append(character_id)
+
+        character = catalog.get(character_id)
+        if character is None:
+            continue
+
+        analysis.num_known += 1
+        type_field = character_type_fields[character.character_type]
+        setattr(analysis, type_field, getattr(analysis, type_field) + 1)
+        if character.edition > analysis.edition:
+            analysis.edition = character.edition
+        analysis.fingerprint |= characters.character_bit(character)
+
+    return analysis
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable
+
+from django.contrib.postgres.search import (
+    CombinedSearchVector,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F, TextField, Value
+
+from scripts import characters, models
+
+# Text search configuration used both when building and when querying the vectors.
+SEARCH_CONFIG = "english"
+
+
+def get_character_text(content: Iterable[Dict], catalog=None) -> str:
+    """
+    Names and abilities of the known characters in a script's JSON.
+    """
+    catalog = catalog or characters.get_catalog()
+    text = []
+    for item in content:
+        character = catalog.get(item.get("id")) if isinstance(item, dict) else None
+        if character:
+            text.append(character.character_name)
+            text.append(character.ability)
+    return " ".join(text)
+
+
+def build_search_vector(
+    name: str, author: str, notes: str, character_text: str
+) -> CombinedSearchVector:
+    """
+    Weighted search vector expression, so that a match in the script name ranks
+    above one in the author, notes or characters.
+    """
+    parts = [(name, "A"), (author, "B"), (notes, "C"), (character_text, "D")]
+    vector = None
+    for text, weight in parts:
+        part = SearchVector(
+            Value(text or "", output_field=TextField()),
+            config=SEARCH_CONFIG,
+            weight=weight,
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(script_version: models.ScriptVersion, catalog=None) -> None:
+    """
+    Store the search vector for a script version. Call after anything it's built
+    from has changed.
+    """
+    models.ScriptVersion.objects.filter(pk=script_version.pk).update(
+        search_vector=build_search_vector(
+            script_version.script.name,
+            script_version.author,
+            script_version.notes,
+            get_character_text(script_version.content, catalog),
+        )
+    )
+
+
+def search(queryset, value: str):
+    """
+    Filter a ScriptVersion queryset with a web search style query, annotating each
+    result with its rank.
+    """
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F("search_vector"), query)
+    )
@@ -6,7 +6,6 @@ from scripts import models
 # Serializers define the API representation.
 class ScriptSerializer(serializers.ModelSerializer):
     name = serializers.CharField(source="script.name")
-    score = serializers.ReadOnlyField(source="votes.count")
 
     class Meta:
         model = models.ScriptVersion
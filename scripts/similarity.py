@@ -0,0 +1,360 @@
+from typing import Dict, Iterable, List, Set
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Greatest, Least, NullIf
+
+from scripts import counters, minhash, models
+
+SIMILAR_SCRIPTS_TO_DISPLAY = 10
+SIMILARITY_MODES = ["exact", "approx"]
+
+
+def get_fingerprint_similarity(
+    fingerprint1: int, fingerprint2: int, same_type: bool
+) -> int:
+    """
+    The percentage of characters two scripts share, measured against the larger
+    script if they are the same type and against the smaller one otherwise.
+    """
+    size1 = fingerprint1.bit_count()
+    size2 = fingerprint2.bit_count()
+    similarity_comp = max(size1, size2) if same_type else min(size1, size2)
+    if similarity_comp == 0:
+        return 0
+
+    return round(((fingerprint1 & fingerprint2).bit_count() / similarity_comp) * 100)
+
+
+def get_similar_scripts(
+    script_version: models.ScriptVersion,
+    limit: int = SIMILAR_SCRIPTS_TO_DISPLAY,
+    mode: str = "exact",
+    min_bands: int = 1,
+) -> Dict[str, List[Dict]]:
+    """
+    The most similar latest scripts of each type to the given script version.
+
+    In exact mode only scripts sharing a character with this one are looked at,
+    found through the ScriptCharacter index, so the work scales with the number of
+    overlapping scripts rather than the corpus. Results match scan_similar_scripts.
+
+    In approx mode only scripts sharing at least min_bands MinHash bands are
+    compared, which may miss some similar scripts but stays fast when popular
+    characters make most of the corpus overlap. A script version without a MinHash
+    signature has no bands to match, so falls back to exact mode.
+    """
+    if mode == "approx":
+        if script_version.minhash:
+            candidates = models.ScriptVersion.objects.filter(
+                pk__in=minhash.get_candidates(script_version, min_bands)
+            )
+            return rank_candidates(script_version, candidates, limit)
+    elif mode != "exact":
+        raise ValueError(f"Unknown similarity mode {mode}")
+
+    similar_scripts = find_similar_scripts(script_version, limit)
+    for scripts in similar_scripts.values():
+        for script in scripts:
+            del script["pk"]
+    return similar_scripts
+
+
+def find_similar_scripts(
+    script_version: models.ScriptVersion, limit: int = SIMILAR_SCRIPTS_TO_DISPLAY
+) -> Dict[str, List[Dict]]:
+    """
+    Exact get_similar_scripts, also giving the primary key of each similar version.
+    """
+    character_pks = list(
+        script_version.characters.values_list("character", flat=True)
+    )
+    return {
+        script_type.value: get_similar_scripts_of_type(
+            script_version, script_type, character_pks, limit
+        )
+        for script_type in models.ScriptTypes
+    }
+
+
+def overlapping_scripts(
+    script_version: models.ScriptVersion,
+    script_type: models.ScriptTypes,
+    character_pks: List[int],
+) -> QuerySet:
+    """
+    Latest script versions of a type sharing any of the characters, annotated with
+    the number shared (overlap), the size the similarity percentage is measured
+    against (denominator) and the unrounded percentage (similarity).
+
+    Both the overlap and the sizes are counted from ScriptCharacter, so the
+    similarity can't exceed 100%.
+    """
+    size = len(character_pks)
+    # Measured against the larger script if they're the same type, else the smaller.
+    if script_version.script_type == script_type:
+        denominator = Greatest("size", Value(size))
+    else:
+        denominator = Least("size", Value(size))
+    return (
+        models.ScriptVersion.objects.filter(
+            latest=True,
+            script_type=script_type,
+            characters__character__in=character_pks,
+        )
+        .exclude(pk=script_version.pk)
+        .annotate(
+            overlap=Count("characters"),
+            size=counters.live_count(models.ScriptCharacter, "script_version"),
+        )
+        .annotate(denominator=NullIf(denominator, 0))
+        .annotate(
+            similarity=Cast("overlap", FloatField())
+            * 100
+            / Cast("denominator", FloatField())
+        )
+        .filter(denominator__isnull=False)
+    )
+
+
+def get_similar_scripts_of_type(
+    script_version: models.ScriptVersion,
+    script_type: models.ScriptTypes,
+    character_pks: List[int],
+    limit: int,
+) -> List[Dict]:
+    latest = models.ScriptVersion.objects.filter(
+        latest=True, script_type=script_type
+    ).exclude(pk=script_version.pk)
+    overlapping = overlapping_scripts(script_version, script_type, character_pks).values(
+        "pk", "script_id", "script__name", "overlap", "denominator", "similarity"
+    )
+
+    # Postgres rounds halves differently to Python, so find the rounded value of the
+    # limit'th most similar script, then fetch everything that could round to at
+    # least that and rank them in Python. Scripts rounding to zero are left to the
+    # padding below.
+    candidates = list(overlapping.order_by("-similarity", "pk")[:limit])
+    if len(candidates) == limit:
+        threshold = get_overlap_similarity(
+            candidates[-1]["overlap"], candidates[-1]["denominator"]
+        )
+        if threshold > 0:
+            candidates = list(overlapping.filter(
+                similarity__gte=threshold - 0.5 - 1e-9
+            ))
+
+    similar = [
+        {
+            "value": get_overlap_similarity(
+                candidate["overlap"], candidate["denominator"]
+            ),
+            "name": candidate["script__name"],
+            "scriptPK": candidate["script_id"],
+            "pk": candidate["pk"],
+        }
+        for candidate in candidates
+    ]
+    similar.sort(key=lambda x: (-x["value"], x["pk"]))
+    similar = [script for script in similar if script["value"] > 0][:limit]
+
+    # Like a full scan, pad with the lowest keyed dissimilar scripts.
+    if len(similar) < limit:
+        similar_pks = [script["pk"] for script in similar]
+        padding = (
+            latest.exclude(pk__in=similar_pks)
+            .order_by("pk")
+            .values("pk", "script_id", "script__name")[: limit - len(similar)]
+        )
+        similar.extend(
+            {
+                "value": 0,
+                "name": script["script__name"],
+                "scriptPK": script["script_id"],
+                "pk": script["pk"],
+            }
+            for script in padding
+        )
+    return similar
+
+
+def get_overlap_similarity(overlap: int, denominator: int) -> int:
+    """
+    get_fingerprint_similarity, given the shared character count and the size it's
+    measured against.
+    """
+    return round((overlap / denominator) * 100)
+
+
+def scan_similar_scripts(
+    script_version: models.ScriptVersion, limit: int = SIMILAR_SCRIPTS_TO_DISPLAY
+) -> Dict[str, List[Dict]]:
+    """
+    get_similar_scripts by comparing fingerprints against every latest script. Kept
+    as the reference implementation for benchmark_similar_scripts.
+    """
+    candidates = models.ScriptVersion.objects.filter(latest=True).exclude(
+        pk=script_version.pk
+    )
+    return rank_candidates(script_version, candidates, limit)
+
+
+def rank_candidates(
+    script_version: models.ScriptVersion, candidates: QuerySet, limit: int
+) -> Dict[str, List[Dict]]:
+    """
+    Compare the fingerprints of the candidate script versions against the script
+    version, returning the most similar of each type.
+    """
+    similarity = {script_type.value: [] for script_type in models.ScriptTypes}
+    candidates = candidates.order_by("pk").values(
+        "script_id", "script__name", "script_type", "fingerprint"
+    )
+    for candidate in candidates:
+        similarity[candidate["script_type"]].append(
+            {
+                "value": get_fingerprint_similarity(
+                    script_version.fingerprint,
+                    candidate["fingerprint"],
+                    script_version.script_type == candidate["script_type"],
+                ),
+                "name": candidate["script__name"],
+                "scriptPK": candidate["script_id"],
+            }
+        )
+
+    for script_type, scripts in similarity.items():
+        # sorted is stable, so equally similar scripts stay in primary key order.
+        similarity[script_type] = sorted(
+            scripts, key=lambda x: x["value"], reverse=True
+        )[:limit]
+    return similarity
+
+
+def store_similar_scripts(script_version: models.ScriptVersion) -> None:
+    """
+    Recompute and store the SimilarScript rows of a latest script version.
+    """
+    similar_scripts = find_similar_scripts(script_version)
+    with transaction.atomic():
+        models.SimilarScript.objects.filter(script_version=script_version).delete()
+        models.SimilarScript.objects.bulk_create(
+            [
+                models.SimilarScript(
+                    script_version=script_version,
+                    similar_id=script["pk"],
+                    script_type=script_type,
+                    rank=rank,
+                    value=script["value"],
+                )
+                for script_type, scripts in similar_scripts.items()
+                for rank, script in enumerate(scripts)
+            ]
+        )
+
+
+def get_stored_similar_scripts(
+    script_version: models.ScriptVersion,
+) -> Dict[str, List[Dict]]:
+    """
+    get_similar_scripts for a latest script version from its SimilarScript rows.
+
+    Lists are cleared rather than recomputed when scripts change, so if there are
+    no rows the list is computed for this request without being stored, and
+    rebuild_similar_scripts --missing stores it later.
+    """
+    rows = list(
+        models.SimilarScript.objects.filter(script_version=script_version)
+        .order_by("script_type", "rank")
+        .values_list("script_type", "value", "similar__script__name", "similar__script_id")
+    )
+    if not rows:
+        return get_similar_scripts(script_version)
+
+    similar_scripts = {script_type.value: [] for script_type in models.ScriptTypes}
+    for script_type, value, name, script_pk in rows:
+        similar_scripts[script_type].append(
+            {"value": value, "name": name, "scriptPK": script_pk}
+        )
+    return similar_scripts
+
+
+def clear_similar_scripts(script_version_pks: Iterable[int]) -> None:
+    """
+    Drop the stored similar scripts of those script versions, so they're computed
+    on request until rebuild_similar_scripts --missing stores them again.
+    """
+    models.SimilarScript.objects.filter(
+        script_version__in=list(script_version_pks)
+    ).delete()
+
+
+def remove_similar_script(script_version: models.ScriptVersion) -> None:
+    """
+    Clear the stored similar scripts of a script version that's stopping being
+    latest, and those of the script versions listing it.
+    """
+    listing = models.SimilarScript.objects.filter(similar=script_version).values(
+        "script_version"
+    )
+    models.SimilarScript.objects.filter(
+        Q(script_version=script_version) | Q(script_version__in=listing)
+    ).delete()
+
+
+def displaced_versions(script_version: models.ScriptVersion) -> Set[int]:
+    """
+    Primary keys of latest script versions with stored similar scripts that a new
+    latest script version could appear in.
+    """
+    limit = SIMILAR_SCRIPTS_TO_DISPLAY
+    script_type = script_version.script_type
+
+    # Lists with fewer than limit scripts of this type are padded with every other
+    # latest script of the type, so will gain this one.
+    full = models.SimilarScript.objects.filter(
+        script_type=script_type, rank=limit - 1
+    ).values("script_version")
+    displaced = set(
+        models.SimilarScript.objects.exclude(script_version__in=full)
+        .exclude(script_version=script_version)
+        .values_list("script_version", flat=True)
+        .distinct()
+    )
+
+    # Similarity is symmetric, so the scripts this one is similar to are the ones it
+    # could be similar to, if it beats the last entry of their full list of its type.
+    last_entry = models.SimilarScript.objects.filter(
+        script_version=OuterRef("pk"), script_type=script_type, rank=limit - 1
+    ).values("value")
+    character_pks = list(
+        script_version.characters.values_list("character", flat=True)
+    )
+    for list_type in models.ScriptTypes:
+        candidates = (
+            overlapping_scripts(script_version, list_type, character_pks)
+            .annotate(last_value=Subquery(last_entry))
+            .filter(similarity__gte=F("last_value") - 0.5 - 1e-9)
+            .values_list("pk", "overlap", "denominator", "last_value")
+        )
+        for pk, overlap, denominator, last_value in candidates:
+            if get_overlap_similarity(overlap, denominator) >= last_value:
+                displaced.add(pk)
+    return displaced
+
+
+def add_similar_script(script_version: models.ScriptVersion) -> None:
+    """
+    Clear the stored lists that a script version that's become latest could now
+    appear in. Its own list is left to be computed on request too.
+    """
+    clear_similar_scripts(displaced_versions(script_version) | {script_version.pk})
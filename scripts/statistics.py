@@ -0,0 +1,397 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import CharField, Count, DateField, F, Max, Q, QuerySet, Sum, Value
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from scripts import characters, models, script_json
+
+
+def character_counts(
+    queryset: QuerySet, exclude: Optional[models.Character] = None
+) -> Counter:
+    """
+    Number of script versions in the queryset containing each Character, from a
+    single GROUP BY over the membership table. Every character in the catalog is
+    included, in catalog order, so ones in no scripts count as zero.
+    """
+    rows = (
+        models.ScriptCharacter.objects.filter(script_version__in=queryset.values("pk"))
+        .values("character")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    counts = {row["character"]: row["count"] for row in rows}
+
+    counter = Counter()
+    for character in characters.get_catalog().all():
+        if character == exclude:
+            continue
+        counter[character] = counts.get(character.pk, 0)
+    return counter
+
+
+def type_histograms(queryset: QuerySet) -> Dict[str, Dict[str, int]]:
+    """
+    For each CharacterType, the number of script versions in the queryset with each
+    count of that type, from one query over the union of per field GROUP BYs.
+
+    Histograms are keyed on the CharacterType value and cover every count from the
+    smallest to the largest present, so missing counts are zero.
+    """
+    queryset = queryset.order_by()
+    per_field = [
+        queryset.annotate(field=Value(field, output_field=CharField()))
+        .values("field", value=F(field))
+        .annotate(count=Count("pk"))
+        for field in script_json.character_type_fields.values()
+    ]
+    found = {field: {} for field in script_json.character_type_fields.values()}
+    for row in per_field[0].union(*per_field[1:], all=True):
+        found[row["field"]][row["value"]] = row["count"]
+
+    histograms = {}
+    for type, field in script_json.character_type_fields.items():
+        counts = found[field]
+        histograms[type.value] = {
+            str(i): counts.get(i, 0)
+            for i in (range(min(counts), max(counts) + 1) if counts else [])
+        }
+    return histograms
+
+
+# (character pk or None for the total, latest, edition, script_type)
+StatisticKey = Tuple[Optional[int], bool, int, str]
+
+
+def record_script_version(script_version: models.ScriptVersion, delta: int) -> None:
+    """
+    Add (delta=1) or remove (delta=-1) a script version from the CharacterStatistic
+    rollup, under its current latest flag, edition and script type.
+
+    Latest versions are also added to or removed from the CharacterCooccurrence
+    counts.
+
+    Call after the version's ScriptCharacter rows have been created when adding,
+    and before the version is deleted or its partition changes when removing.
+    """
+    partition = {
+        "latest": script_version.latest,
+        "edition": script_version.edition,
+        "script_type": script_version.script_type,
+    }
+    character_pks = list(
+        script_version.characters.values_list("character", flat=True)
+    )
+    models.CharacterStatistic.objects.bulk_create(
+        [
+            models.CharacterStatistic(character_id=pk, **partition)
+            for pk in [None, *character_pks]
+        ],
+        ignore_conflicts=True,
+    )
+    models.CharacterStatistic.objects.filter(
+        Q(character__in=character_pks) | Q(character=None), **partition
+    ).update(count=F("count") + delta)
+
+    if script_version.latest:
+        record_cooccurrences(character_pks, delta)
+
+
+def record_cooccurrences(character_pks: List[int], delta: int) -> None:
+    """
+    Adjust the CharacterCooccurrence count of every ordered pair of the characters
+    in a latest script version, including each character with itself.
+    """
+    models.CharacterCooccurrence.objects.bulk_create(
+        [
+            models.CharacterCooccurrence(character_id=character, partner_id=partner)
+            for character in character_pks
+            for partner in character_pks
+        ],
+        ignore_conflicts=True,
+    )
+    models.CharacterCooccurrence.objects.filter(
+        character__in=character_pks, partner__in=character_pks
+    ).update(count=F("count") + delta)
+
+
+def set_latest(script_version: models.ScriptVersion, latest: bool) -> None:
+    """
+    Change whether a script version is the latest, moving it between the
+    CharacterStatistic partitions.
+    """
+    if script_version.latest == latest:
+        return
+    record_script_version(script_version, -1)
+    script_version.latest = latest
+    script_version.save(update_fields=["latest"])
+    record_script_version(script_version, 1)
+
+
+def precomputed_character_counts(
+    latest_only: bool = True, edition: Optional[models.Edition] = None
+) -> Tuple[int, Counter]:
+    """
+    The total number of script versions and the character_counts of an otherwise
+    unfiltered set of script versions, read from the CharacterStatistic rollup.
+    """
+    rows = models.CharacterStatistic.objects.all()
+    if latest_only:
+        rows = rows.filter(latest=True)
+    if edition is not None:
+        rows = rows.filter(edition__lte=edition)
+    counts = dict(
+        rows.values_list("character").annotate(count=Sum("count")).order_by()
+    )
+    total = counts.pop(None, 0)
+
+    counter = Counter()
+    for character in characters.get_catalog().all():
+        counter[character] = counts.get(character.pk, 0)
+    return total, counter
+
+
+def live_character_statistics() -> Dict[StatisticKey, int]:
+    """
+    The CharacterStatistic counts recomputed from the script versions.
+    """
+    live = {}
+    totals = (
+        models.ScriptVersion.objects.values_list("latest", "edition", "script_type")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for latest, edition, script_type, count in totals:
+        live[(None, latest, edition, script_type)] = count
+
+    memberships = (
+        models.ScriptCharacter.objects.values_list(
+            "character",
+            "script_version__latest",
+            "script_version__edition",
+            "script_version__script_type",
+        )
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for character, latest, edition, script_type, count in memberships:
+        live[(character, latest, edition, script_type)] = count
+    return live
+
+
+def replace_counts(model, key_fields: List[str], live: Dict, fix: bool) -> Dict:
+    """
+    Compare the count column of a precomputed table against live counts keyed on
+    key_fields, optionally replacing the table. Returns the (stored, live) counts of
+    every key that differs.
+    """
+    with transaction.atomic():
+        stored = {
+            row[:-1]: row[-1]
+            for row in model.objects.values_list(*key_fields, "count").iterator()
+        }
+        differences = {
+            key: (stored.get(key, 0), live.get(key, 0))
+            for key in stored.keys() | live.keys()
+            if stored.get(key, 0) != live.get(key, 0)
+        }
+        if fix and differences:
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                [
+                    model(count=count, **dict(zip(key_fields, key)))
+                    for key, count in live.items()
+                ],
+                batch_size=1000,
+            )
+    return differences
+
+
+def rebuild_character_statistics(fix: bool = True) -> Dict[StatisticKey, Tuple[int, int]]:
+    """
+    Compare the CharacterStatistic rollup against the script versions, optionally
+    replacing it. Returns the (stored, live) counts of every partition that differs.
+    """
+    return replace_counts(
+        models.CharacterStatistic,
+        ["character_id", "latest", "edition", "script_type"],
+        live_character_statistics(),
+        fix,
+    )
+
+
+def live_cooccurrences() -> Dict[Tuple[int, int], int]:
+    """
+    The CharacterCooccurrence counts recomputed from the latest script versions.
+    """
+    pairs = (
+        models.ScriptCharacter.objects.filter(script_version__latest=True)
+        .values_list("character", "script_version__characters__character")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    return {(character, partner): count for character, partner, count in pairs}
+
+
+def rebuild_cooccurrences(fix: bool = True) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    """
+    Compare the CharacterCooccurrence counts against the latest script versions,
+    optionally replacing them. Returns the (stored, live) counts of every pair
+    that differs.
+    """
+    return replace_counts(
+        models.CharacterCooccurrence,
+        ["character_id", "partner_id"],
+        live_cooccurrences(),
+        fix,
+    )
+
+
+@dataclass
+class Partner:
+    character: models.Character
+    count: int
+    lift: float
+
+
+def character_partners(
+    character: models.Character, limit: Optional[int] = None
+) -> Tuple[int, int, List[Partner]]:
+    """
+    The number of latest script versions, the number containing the character and
+    the characters most often appearing alongside it.
+
+    Lift is how much more often a partner appears with the character than it would
+    if characters were chosen independently, so 1.0 means no association.
+    """
+    total = (
+        models.CharacterStatistic.objects.filter(
+            latest=True, character=None
+        ).aggregate(total=Sum("count"))["total"]
+        or 0
+    )
+    appearances = dict(
+        models.CharacterCooccurrence.objects.filter(
+            character=F("partner"), count__gt=0
+        ).values_list("character", "count")
+    )
+    count = appearances.get(character.pk, 0)
+
+    rows = (
+        models.CharacterCooccurrence.objects.filter(character=character, count__gt=0)
+        .exclude(partner=character)
+        .order_by("-count", "partner")
+        .values_list("partner", "count")
+    )
+    if limit is not None:
+        rows = rows[:limit]
+
+    by_pk = {c.pk: c for c in characters.get_catalog().all()}
+    partners = []
+    for partner_pk, pair_count in rows:
+        partner = by_pk.get(partner_pk)
+        if partner is None:
+            # Added since this process last loaded the catalog.
+            continue
+        # Appearances can only be missing if the precomputed tables have drifted.
+        expected = count * appearances.get(partner_pk, 0)
+        partners.append(
+            Partner(
+                character=partner,
+                count=pair_count,
+                lift=(pair_count * total) / expected if expected else 0.0,
+            )
+        )
+    return total, count, partners
+
+
+# Periods the character time series can be bucketed into.
+TIMESERIES_BUCKETS = ["day", "week", "month", "year"]
+
+# Recent days that rollup_days recomputes on each run, so that script versions
+# deleted since are dropped from them.
+ROLLUP_WINDOW_DAYS = 7
+
+
+def rollup_days(since: Optional[date] = None) -> int:
+    """
+    Fill in CharacterDailyCount for every complete day from since onwards, replacing
+    any existing rows for those days. Returns the number of rows written.
+
+    By default the last ROLLUP_WINDOW_DAYS days are rolled up again, or every day
+    after the last one rolled up if that's earlier, or every day if there are no
+    rollups yet.
+    """
+    # Today is still in progress, so leave it for the next run.
+    today = timezone.localdate()
+    if since is None:
+        last_day = models.CharacterDailyCount.objects.aggregate(last_day=Max("day"))[
+            "last_day"
+        ]
+        if last_day is not None:
+            since = min(
+                last_day + timedelta(days=1),
+                today - timedelta(days=ROLLUP_WINDOW_DAYS),
+            )
+
+    versions = models.ScriptVersion.objects.filter(created__date__lt=today)
+    replaced = models.CharacterDailyCount.objects.filter(day__lt=today)
+    if since is not None:
+        versions = versions.filter(created__date__gte=since)
+        replaced = replaced.filter(day__gte=since)
+
+    totals = (
+        versions.annotate(day=TruncDate("created"))
+        .values_list("day")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    memberships = (
+        models.ScriptCharacter.objects.filter(script_version__in=versions.values("pk"))
+        .annotate(day=TruncDate("script_version__created"))
+        .values_list("character", "day")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    rows = [
+        models.CharacterDailyCount(day=day, count=count) for day, count in totals
+    ] + [
+        models.CharacterDailyCount(character_id=character, day=day, count=count)
+        for character, day, count in memberships
+    ]
+
+    with transaction.atomic():
+        replaced.delete()
+        models.CharacterDailyCount.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def character_timeseries(
+    character: models.Character, bucket: str = "month"
+) -> List[Dict[str, Any]]:
+    """
+    Per bucket, the number of uploaded script versions containing the character and
+    the total number uploaded, read from the daily rollups.
+    """
+    if bucket not in TIMESERIES_BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket}")
+
+    rows = (
+        models.CharacterDailyCount.objects.filter(
+            Q(character=character) | Q(character=None)
+        )
+        .annotate(period=Trunc("day", bucket, output_field=DateField()))
+        .values_list("period", "character")
+        .annotate(count=Sum("count"))
+        .order_by("period")
+    )
+    periods = {}
+    for period, character_pk, count in rows:
+        entry = periods.setdefault(period, {"period": period, "count": 0, "total": 0})
+        entry["total" if character_pk is None else "count"] = count
+    return list(periods.values())
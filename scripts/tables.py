@@ -33,7 +33,13 @@ excluded_script_version_fields = (
     "num_fabled",
     "edition",
     "version",
-    "pdf"
+    "pdf",
+    "fingerprint",
+    "num_comments",
+    "num_tags",
+    "search_vector",
+    "minhash",
+    "content_hash",
 )
 
 
@@ -52,6 +58,9 @@ class ScriptTable(tables.Table):
         )
         orderable = True
 
+    # Script statistics rendered by this table, see ScriptVersionQuerySet.with_stats.
+    stats = ("score", "num_favs", "num_tags")
+
     name = tables.Column(
         empty_values=(),
         order_by= ( "script.name", "-version" ),
@@ -1,33 +1,10 @@
 from django import template
-from scripts import models
+from scripts import characters, models
 from babel.core import Locale, UnknownLocaleError
 
 register = template.Library()
 
 
-@register.simple_tag(takes_context=True)
-def user_voted(context, script_version):
-    user = context["user"]
-    if user.votes.filter(script=script_version).exists():
-        return "btn-danger"
-    return "btn-success"
-
-@register.simple_tag(takes_context=True)
-def user_voted_icon(context, script_version):
-    user = context["user"]
-    if user.votes.filter(script=script_version).exists():
-        return "hand-thumbs-down-fill"
-    return "hand-thumbs-up-fill"
-
-
-@register.simple_tag(takes_context=True)
-def user_favourite(context, script_version):
-    user = context["user"]
-    if user.favourites.filter(script=script_version).exists():
-        return "star-fill"
-    return "star"
-
-
 @register.simple_tag(takes_context=True)
 def script_has_tag(context, tag, initial):
     tags = initial.get("tags", None)
@@ -36,55 +13,30 @@ def script_has_tag(context, tag, initial):
     return False
 
 
-@register.simple_tag()
-def script_in_collection(collection, script_version):
-    if script_version in collection.scripts.all():
-        return True
-    return False
-
-
-@register.simple_tag()
-def script_not_in_user_collection(user, script_version):
-    for collection in user.collections.all():
-        if script_version not in collection.scripts.all():
-            return True
-    return False
-
-
 @register.simple_tag()
 def character_colourisation(character_id):
-    try:
-        character = models.Character.objects.get(character_id=character_id)
-        if character.character_type == models.CharacterType.TOWNSFOLK:
-            return "style=color:#0000ff"
-        if character.character_type == models.CharacterType.OUTSIDER:
-            return "style=color:#00ccff"
-        if character.character_type == models.CharacterType.MINION:
-            return "style=color:#ff8000"
-        if character.character_type == models.CharacterType.DEMON:
-            return "style=color:#ff0000"
-        if character.character_type == models.CharacterType.TRAVELLER:
-            return "style=color:#cc0099"
-        if character.character_type == models.CharacterType.FABLED:
-            return "style=color:#996600"
-    except models.Character.DoesNotExist:
+    character = characters.get_character(character_id)
+    if character is None:
         return "style=color:#000000"
+    if character.character_type == models.CharacterType.TOWNSFOLK:
+        return "style=color:#0000ff"
+    if character.character_type == models.CharacterType.OUTSIDER:
+        return "style=color:#00ccff"
+    if character.character_type == models.CharacterType.MINION:
+        return "style=color:#ff8000"
+    if character.character_type == models.CharacterType.DEMON:
+        return "style=color:#ff0000"
+    if character.character_type == models.CharacterType.TRAVELLER:
+        return "style=color:#cc0099"
+    if character.character_type == models.CharacterType.FABLED:
+        return "style=color:#996600"
 
 
 @register.simple_tag()
 def character_type_change(content, counter):
     if counter > 0:
-        prev_character_id = content[counter - 1].get("id", None)
-        curr_character_id = content[counter].get("id", None)
-        try:
-            prev_character = models.Character.objects.get(
-                character_id=prev_character_id
-            )
-            curr_character = models.Character.objects.get(
-                character_id=curr_character_id
-            )
-        except models.Character.DoesNotExist:
-            return False
+        prev_character = characters.get_character(content[counter - 1].get("id", None))
+        curr_character = characters.get_character(content[counter].get("id", None))
 
         if prev_character and curr_character:
             if prev_character.character_type != curr_character.character_type:
@@ -94,10 +46,10 @@ def character_type_change(content, counter):
 
 @register.simple_tag()
 def convert_id_to_friendly_text(character_id):
-    try:
-        return models.Character.objects.get(character_id=character_id).character_name
-    except models.Character.DoesNotExist:
+    character = characters.get_character(character_id)
+    if character is None:
         return character_id
+    return character.character_name
 
 
 @register.filter
@@ -0,0 +1,747 @@
+import os
+import random
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from scripts import (
+    characters,
+    clustering,
+    comments,
+    constants,
+    counters,
+    diffs,
+    duplicates,
+    models,
+    script_json,
+    similarity,
+    statistics,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def get_json_additions(old_json, new_json):
+    """
+    The quadratic diff ScriptView used before version diffs were stored, kept as the
+    reference behaviour for scripts.diffs. Returns the entries of new_json that
+    aren't in old_json, mutating new_json.
+    """
+    for old_id in old_json:
+        if old_id["id"] == "_meta":
+            continue
+        for new_id in new_json:
+            if new_id["id"] == "_meta":
+                continue
+
+            if old_id == new_id:
+                new_json.remove(new_id)
+
+    for new_id in new_json:
+        if new_id["id"] == "_meta":
+            new_json.remove(new_id)
+            break
+
+    return new_json
+
+
+def reference_diff(old_content, new_content):
+    added = get_json_additions(old_content.copy(), new_content.copy())
+    removed = get_json_additions(new_content.copy(), old_content.copy())
+    return [item["id"] for item in added], [item["id"] for item in removed]
+
+
+def script(*ids, meta=None):
+    content = [{"id": "_meta", "name": meta}] if meta else []
+    for id in ids:
+        content.append(id if isinstance(id, dict) else {"id": id})
+    return content
+
+
+HOMEBREW = {"id": "homebrew_character", "name": "Homebrew", "team": "townsfolk"}
+
+
+CHARACTERS = [
+    ("imp", models.CharacterType.DEMON),
+    ("po", models.CharacterType.DEMON),
+    ("chef", models.CharacterType.TOWNSFOLK),
+    ("empath", models.CharacterType.TOWNSFOLK),
+    ("monk", models.CharacterType.TOWNSFOLK),
+    ("slayer", models.CharacterType.TOWNSFOLK),
+    ("mayor", models.CharacterType.TOWNSFOLK),
+    ("virgin", models.CharacterType.TOWNSFOLK),
+    ("drunk", models.CharacterType.OUTSIDER),
+    ("recluse", models.CharacterType.OUTSIDER),
+    ("spy", models.CharacterType.MINION),
+    ("baron", models.CharacterType.MINION),
+]
+
+
+def create_characters():
+    for character_id, character_type in CHARACTERS:
+        models.Character.objects.create(
+            character_id=character_id,
+            character_name=character_id.title(),
+            ability="",
+            character_type=character_type,
+            edition=models.Edition.BASE,
+        )
+
+
+def create_script_version(name, *ids, version="1", latest=True, owner=None, **kwargs):
+    script_object, _ = models.Script.objects.get_or_create(name=name, owner=owner)
+    content = script(*ids)
+    script_version = models.ScriptVersion.objects.create(
+        script=script_object,
+        version=version,
+        content=content,
+        latest=latest,
+        **script_json.analyse_script(content).model_fields(),
+        **kwargs,
+    )
+    characters.update_script_characters(script_version)
+    return script_version
+
+
+class DiffContentTest(SimpleTestCase):
+    def assertMatchesReference(self, old_content, new_content):
+        self.assertEqual(
+            diffs.diff_content(old_content, new_content),
+            reference_diff(old_content, new_content),
+        )
+
+    def test_additions_and_removals(self):
+        self.assertMatchesReference(
+            script("imp", "chef", "spy"), script("imp", "drunk", "spy", "baron")
+        )
+
+    def test_unchanged(self):
+        self.assertMatchesReference(script("imp", "chef"), script("imp", "chef"))
+        self.assertEqual(
+            diffs.diff_content(script("imp", "chef"), script("imp", "chef")), ([], [])
+        )
+
+    def test_reordered(self):
+        self.assertMatchesReference(
+            script("imp", "chef", "spy", "drunk"), script("spy", "drunk", "chef", "imp")
+        )
+        self.assertMatchesReference(
+            script("imp", "chef", "spy"), script("baron", "spy", "imp")
+        )
+
+    def test_meta(self):
+        self.assertMatchesReference(
+            script("imp", "chef", meta="Old"), script("imp", "spy", meta="New")
+        )
+        self.assertMatchesReference(script("imp", "chef"), script("imp", meta="New"))
+        self.assertMatchesReference(script("imp", meta="Old"), script("imp", "chef"))
+
+    def test_homebrew(self):
+        self.assertMatchesReference(script("imp"), script("imp", HOMEBREW))
+        self.assertMatchesReference(script("imp", HOMEBREW), script("imp", "chef"))
+        self.assertMatchesReference(
+            script("imp", HOMEBREW), script("chef", HOMEBREW, "imp")
+        )
+
+    def test_changed_homebrew_is_unchanged(self):
+        # The reference compared whole entries, so editing a homebrew character's
+        # details reported it as both added and removed. Diffs compare ids.
+        edited = dict(HOMEBREW, name="Renamed")
+        self.assertEqual(
+            reference_diff(script("imp", HOMEBREW), script("imp", edited)),
+            (["homebrew_character"], ["homebrew_character"]),
+        )
+        self.assertEqual(
+            diffs.diff_content(script("imp", HOMEBREW), script("imp", edited)),
+            ([], []),
+        )
+
+    def test_duplicates(self):
+        # The reference reported a duplicated addition once per copy, and because it
+        # removed from the list it was iterating over, a character duplicated in one
+        # version but present in both was reported as changed. Diffs report each
+        # character once.
+        self.assertEqual(
+            reference_diff(script("imp", "chef"), script("imp", "spy", "spy")),
+            (["spy", "spy"], ["chef"]),
+        )
+        self.assertEqual(
+            diffs.diff_content(script("imp", "chef"), script("imp", "spy", "spy")),
+            (["spy"], ["chef"]),
+        )
+        self.assertEqual(
+            reference_diff(script("imp", "imp"), script("imp", "chef")),
+            (["chef"], ["imp"]),
+        )
+        self.assertEqual(
+            diffs.diff_content(script("imp", "imp"), script("imp", "chef")),
+            (["chef"], []),
+        )
+
+
+class CompareContentTest(SimpleTestCase):
+    def setUp(self):
+        self.catalog = characters.CharacterCatalog(
+            [
+                models.Character(character_id=id, character_type=type)
+                for id, type in [
+                    ("imp", models.CharacterType.DEMON),
+                    ("chef", models.CharacterType.TOWNSFOLK),
+                    ("drunk", models.CharacterType.OUTSIDER),
+                    ("spy", models.CharacterType.MINION),
+                    ("baron", models.CharacterType.MINION),
+                ]
+            ],
+            version=1,
+        )
+
+    def flatten(self, groups):
+        return sorted(id for ids in groups.values() for id in ids)
+
+    def test_matches_reference(self):
+        cases = [
+            (script("imp", "chef", "spy"), script("imp", "drunk", "spy", "baron")),
+            (script("imp", "chef", "spy"), script("spy", "chef", "imp")),
+            (script("imp", HOMEBREW, meta="Old"), script("baron", "imp", meta="New")),
+            (script("chef"), script("chef", HOMEBREW, "imp")),
+        ]
+        for old_content, new_content in cases:
+            comparison = diffs.compare_content(old_content, new_content, self.catalog)
+            added, removed = reference_diff(old_content, new_content)
+            self.assertEqual(self.flatten(comparison["added"]), sorted(added))
+            self.assertEqual(self.flatten(comparison["removed"]), sorted(removed))
+            self.assertEqual(
+                self.flatten(comparison["unchanged"]),
+                sorted(
+                    set(diffs.character_ids(old_content))
+                    & set(diffs.character_ids(new_content))
+                ),
+            )
+
+    def test_grouped_by_type(self):
+        comparison = diffs.compare_content(
+            script("imp", "chef", HOMEBREW), script("imp", "spy", "baron"), self.catalog
+        )
+        self.assertEqual(comparison["added"]["Minion"], ["spy", "baron"])
+        self.assertEqual(comparison["removed"]["Townsfolk"], ["chef"])
+        self.assertEqual(comparison["removed"]["Unknown"], ["homebrew_character"])
+        self.assertEqual(comparison["unchanged"]["Demon"], ["imp"])
+        self.assertEqual(comparison["added"]["Outsider"], [])
+
+
+class UserStateTest(TestCase):
+    def setUp(self):
+        create_characters()
+        self.user = User.objects.create(username="user")
+        other = User.objects.create(username="other")
+        self.owned = create_script_version("Owned", "imp", owner=self.user)
+        self.voted = create_script_version("Voted", "imp")
+        self.other = create_script_version("Other", "imp", owner=other)
+        models.Vote.objects.create(user=self.user, script=self.voted)
+        models.Favourite.objects.create(user=self.user, script=self.owned)
+        self.comment = models.Comment.objects.create(
+            user=self.user, script=self.other.script, comment="Nice"
+        )
+        models.Comment.objects.create(user=other, script=self.other.script, comment="Ta")
+        self.collection = models.Collection.objects.create(owner=self.user, name="Mine")
+        self.collection.scripts.add(self.voted)
+        models.Collection.objects.create(owner=other, name="Theirs").scripts.add(
+            self.owned
+        )
+
+    def get_state(self, **params):
+        query = "&".join(
+            f"{param}={','.join(str(pk) for pk in pks)}" for param, pks in params.items()
+        )
+        response = self.client.get(f"/api/me/state?{query}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-store", response["Cache-Control"])
+        return response.json()
+
+    def test_anonymous(self):
+        state = self.get_state(versions=[self.voted.pk], scripts=[self.owned.script.pk])
+        self.assertFalse(state["authenticated"])
+        self.assertTrue(state["csrf_token"])
+        self.assertEqual(state["voted"], [])
+        self.assertEqual(state["owned"], [])
+
+    def test_only_requested_ids(self):
+        self.client.force_login(self.user)
+        state = self.get_state(versions=[self.owned.pk])
+        self.assertTrue(state["authenticated"])
+        self.assertEqual(state["voted"], [])
+        self.assertEqual(state["favourites"], [self.owned.pk])
+        self.assertEqual(state["collections"], [])
+        self.assertEqual(state["owned"], [])
+        self.assertEqual(state["comments"], [])
+
+        state = self.get_state(
+            versions=[self.owned.pk, self.voted.pk, self.other.pk],
+            collections=[self.owned.pk],
+            scripts=[self.owned.script.pk, self.other.script.pk],
+        )
+        self.assertEqual(state["voted"], [self.voted.pk])
+        self.assertEqual(
+            state["collections"],
+            [{"pk": self.collection.pk, "name": "Mine", "scripts": []}],
+        )
+        self.assertEqual(state["owned"], [self.owned.script.pk])
+        self.assertEqual(state["comments"], [self.comment.pk])
+
+    def test_too_many_ids(self):
+        ids = ",".join(str(pk) for pk in range(1000))
+        self.assertEqual(
+            self.client.get(f"/api/me/state?versions={ids}").status_code, 400
+        )
+        self.assertEqual(self.client.get("/api/me/state?scripts=a").status_code, 400)
+
+    def test_pages_are_shared(self):
+        for url in ["/", f"/script/{self.owned.script.pk}"]:
+            anonymous = self.client.get(url)
+            self.client.force_login(self.user)
+            logged_in = self.client.get(url)
+            self.client.logout()
+            self.assertEqual(anonymous.content, logged_in.content)
+            self.assertIn("public", logged_in["Cache-Control"])
+            self.assertNotIn("Cookie", logged_in.get("Vary", ""))
+
+        self.client.force_login(self.user)
+        response = self.client.get("/?favourites=on")
+        self.assertIn("private", response["Cache-Control"])
+
+
+class VotedAndFavouritedTest(TestCase):
+    def test_page_in_two_queries(self):
+        create_characters()
+        user = User.objects.create(username="user")
+        versions = [create_script_version(f"Script {i}", "imp") for i in range(5)]
+        models.Vote.objects.create(user=user, script=versions[0])
+        models.Vote.objects.create(user=user, script=versions[4])
+        models.Favourite.objects.create(user=user, script=versions[1])
+        models.Favourite.objects.create(
+            user=User.objects.create(username="other"), script=versions[2]
+        )
+
+        page = models.ScriptVersion.objects.filter(pk__in=[v.pk for v in versions[:4]])
+        with self.assertNumQueries(2):
+            voted, favourited = page.voted_and_favourited(user)
+        self.assertEqual(voted, {versions[0].pk})
+        self.assertEqual(favourited, {versions[1].pk})
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        create_characters()
+        self.user = User.objects.create(username="user")
+        self.first = create_script_version("Script", "imp", version="1", latest=False)
+        self.second = create_script_version("Script", "imp", "chef", version="2")
+
+    def counters(self, script_version):
+        script_version.refresh_from_db()
+        return {field: getattr(script_version, field) for field in counters.COUNTER_FIELDS}
+
+    def test_related_objects(self):
+        vote = models.Vote.objects.create(user=self.user, script=self.second)
+        models.Favourite.objects.create(user=self.user, script=self.second)
+        tag = models.ScriptTag.objects.create(name="Tag", order=1)
+        self.second.tags.add(tag)
+        models.Comment.objects.create(user=self.user, script=self.second.script, comment="Hi")
+        self.assertEqual(
+            self.counters(self.second),
+            {"score": 1, "num_favs": 1, "num_comments": 1, "num_tags": 1},
+        )
+        # Comments are on the script, so every version counts them.
+        self.assertEqual(
+            self.counters(self.first),
+            {"score": 0, "num_favs": 0, "num_comments": 1, "num_tags": 0},
+        )
+
+        vote.delete()
+        tag.scriptversion_set.clear()
+        self.assertEqual(self.counters(self.second)["score"], 0)
+        self.assertEqual(self.counters(self.second)["num_tags"], 0)
+
+    def test_reconcile(self):
+        models.Vote.objects.create(user=self.user, script=self.second)
+        models.ScriptVersion.objects.filter(pk=self.second.pk).update(score=5, num_favs=2)
+        models.ScriptVersion.objects.filter(pk=self.first.pk).update(num_comments=1)
+
+        self.assertEqual(counters.reconcile_counters(fix=False), 2)
+        self.assertEqual(self.counters(self.second)["score"], 5)
+        self.assertEqual(counters.reconcile_counters(), 2)
+        self.assertEqual(
+            self.counters(self.second),
+            {"score": 1, "num_favs": 0, "num_comments": 0, "num_tags": 0},
+        )
+        self.assertEqual(self.counters(self.first)["num_comments"], 0)
+        self.assertEqual(counters.reconcile_counters(fix=False), 0)
+
+
+class SimilarScriptsTest(TestCase):
+    def setUp(self):
+        create_characters()
+        ids = [character_id for character_id, _ in CHARACTERS]
+        generator = random.Random(0)
+        for i in range(24):
+            script_type = models.ScriptTypes.FULL if i % 3 else models.ScriptTypes.TEENSYVILLE
+            create_script_version(
+                f"Script {i}",
+                *generator.sample(ids, generator.randint(3, 8)),
+                script_type=script_type,
+            )
+        self.generator = generator
+        self.ids = ids
+
+    def latest(self):
+        return models.ScriptVersion.objects.filter(latest=True).order_by("pk")
+
+    def assert_stored_match_exact(self):
+        for script_version in self.latest():
+            self.assertEqual(
+                similarity.get_stored_similar_scripts(script_version),
+                similarity.get_similar_scripts(script_version),
+                script_version,
+            )
+
+    def test_exact_matches_scan(self):
+        for script_version in self.latest():
+            self.assertEqual(
+                similarity.get_similar_scripts(script_version),
+                similarity.scan_similar_scripts(script_version),
+            )
+
+    def test_stored_match_exact_after_changes(self):
+        call_command("rebuild_similar_scripts", stdout=open(os.devnull, "w"))
+        self.assert_stored_match_exact()
+
+        # A new version of an existing script.
+        previous = self.latest().first()
+        similarity.remove_similar_script(previous)
+        statistics.set_latest(previous, False)
+        new = create_script_version(
+            previous.script.name, *self.generator.sample(self.ids, 6), version="2"
+        )
+        similarity.add_similar_script(new)
+        self.assert_stored_match_exact()
+
+        # A new script, and a deleted one.
+        new = create_script_version("New", *self.generator.sample(self.ids, 5))
+        similarity.add_similar_script(new)
+        deleted = self.latest().last()
+        similarity.remove_similar_script(deleted)
+        deleted.delete()
+        self.assert_stored_match_exact()
+
+        call_command("rebuild_similar_scripts", "--missing", stdout=open(os.devnull, "w"))
+        self.assertFalse(
+            self.latest().exclude(pk__in=models.SimilarScript.objects.values("script_version"))
+        )
+        self.assert_stored_match_exact()
+
+    def test_request_does_not_store(self):
+        script_version = self.latest().first()
+        self.client.get(
+            f"/script/{script_version.script.pk}/{script_version.version}/similar"
+        )
+        self.assertFalse(models.SimilarScript.objects.exists())
+
+    def test_displaced_versions(self):
+        call_command("rebuild_similar_scripts", stdout=open(os.devnull, "w"))
+        new = create_script_version("New", "imp", "chef", "empath", "monk")
+        displaced = similarity.displaced_versions(new)
+        for script_version in self.latest().exclude(pk=new.pk):
+            before = similarity.get_stored_similar_scripts(script_version)
+            after = similarity.get_similar_scripts(script_version)
+            if before != after:
+                self.assertIn(script_version.pk, displaced)
+        # Every list already has ten Full scripts, so only those the new script
+        # beats are displaced.
+        self.assertTrue(displaced)
+        self.assertLess(len(displaced), self.latest().count() - 1)
+
+
+class RollupDaysTest(TestCase):
+    def setUp(self):
+        create_characters()
+        self.today = timezone.localdate()
+
+    def upload(self, name, days_ago, *ids):
+        script_version = create_script_version(name, *ids)
+        created = timezone.now() - timedelta(days=days_ago)
+        models.ScriptVersion.objects.filter(pk=script_version.pk).update(created=created)
+        return script_version
+
+    def daily_counts(self, character=None):
+        return dict(
+            models.CharacterDailyCount.objects.filter(character=character).values_list(
+                "day", "count"
+            )
+        )
+
+    def test_recent_days_rolled_up_again(self):
+        imp = models.Character.objects.get(character_id="imp")
+        self.upload("Old", 30, "imp")
+        self.upload("Kept", 2, "imp", "chef")
+        deleted = self.upload("Deleted", 2, "imp")
+        emptied = self.upload("Emptied", 1, "imp")
+        self.upload("Today", 0, "imp")
+
+        statistics.rollup_days()
+        day = {days_ago: self.today - timedelta(days=days_ago) for days_ago in (1, 2, 30)}
+        self.assertEqual(self.daily_counts(), {day[30]: 1, day[2]: 2, day[1]: 1})
+        self.assertEqual(self.daily_counts(imp), {day[30]: 1, day[2]: 2, day[1]: 1})
+
+        deleted.delete()
+        emptied.delete()
+        statistics.rollup_days()
+        self.assertEqual(self.daily_counts(), {day[30]: 1, day[2]: 1})
+        self.assertEqual(self.daily_counts(imp), {day[30]: 1, day[2]: 1})
+
+
+class StatisticsTest(TestCase):
+    def setUp(self):
+        create_characters()
+
+    def upload(self, name, *ids, **kwargs):
+        script_version = create_script_version(name, *ids, **kwargs)
+        statistics.record_script_version(script_version, 1)
+        return script_version
+
+    def assert_matches_rebuild(self):
+        self.assertEqual(statistics.rebuild_character_statistics(fix=False), {})
+        self.assertEqual(statistics.rebuild_cooccurrences(fix=False), {})
+
+    def test_maintained_rollups_match_rebuild(self):
+        first = self.upload("Script", "imp", "chef", "spy", latest=False)
+        self.upload("Script", "imp", "empath", "spy", version="2")
+        self.upload("Teensy", "po", "chef", script_type=models.ScriptTypes.TEENSYVILLE)
+        replaced = self.upload("Replaced", "imp", "drunk")
+        self.assert_matches_rebuild()
+
+        # A new version of a script, and a deleted one.
+        statistics.set_latest(replaced, False)
+        self.upload("Replaced", "imp", "recluse", version="2")
+        statistics.record_script_version(first, -1)
+        first.delete()
+        self.assert_matches_rebuild()
+
+        latest = models.ScriptVersion.objects.filter(latest=True)
+        self.assertEqual(
+            statistics.precomputed_character_counts(),
+            (latest.count(), statistics.character_counts(latest)),
+        )
+
+    def test_rebuild_fixes_drift(self):
+        self.upload("Script", "imp", "chef")
+        models.CharacterStatistic.objects.filter(character=None).update(count=5)
+        models.CharacterCooccurrence.objects.all().delete()
+
+        differences = statistics.rebuild_character_statistics(fix=False)
+        self.assertEqual(list(differences.values()), [(5, 1)])
+        self.assertEqual(len(statistics.rebuild_cooccurrences(fix=False)), 4)
+
+        call_command("rebuild_character_statistics", stdout=open(os.devnull, "w"))
+        self.assert_matches_rebuild()
+
+    def test_character_partners(self):
+        imp = characters.get_character("imp")
+        self.upload("One", "imp", "chef", "spy")
+        self.upload("Two", "imp", "chef")
+        self.upload("Three", "po", "spy")
+        self.upload("Four", "po", "empath")
+
+        total, count, partners = statistics.character_partners(imp)
+        self.assertEqual((total, count), (4, 2))
+        self.assertEqual(
+            [(partner.character.character_id, partner.count) for partner in partners],
+            [("chef", 2), ("spy", 1)],
+        )
+        # Chef is only ever with the Imp, spy half the time.
+        self.assertEqual([partner.lift for partner in partners], [2.0, 1.0])
+
+        _, _, partners = statistics.character_partners(imp, limit=1)
+        self.assertEqual(len(partners), 1)
+
+
+@skipUnless(numpy, "clustering requires NumPy")
+class ClusteringTest(TestCase):
+    def setUp(self):
+        create_characters()
+        ids = [character_id for character_id, _ in CHARACTERS]
+        generator = random.Random(0)
+        for i in range(30):
+            script_type = models.ScriptTypes.FULL if i % 3 else models.ScriptTypes.TEENSYVILLE
+            create_script_version(
+                f"Script {i}",
+                *generator.sample(ids, generator.randint(3, 8)),
+                script_type=script_type,
+            )
+        self.versions = list(
+            models.ScriptVersion.objects.order_by("pk").values_list(
+                "pk", "script_type", "fingerprint"
+            )
+        )
+
+    def test_pairs_match_fingerprint_similarity(self):
+        fingerprints = [fingerprint for _, _, fingerprint in self.versions]
+        script_types = [script_type for _, script_type, _ in self.versions]
+        expected = [
+            (row, other_row, value)
+            for row in range(len(fingerprints))
+            for other_row in range(row + 1, len(fingerprints))
+            if (
+                value := similarity.get_fingerprint_similarity(
+                    fingerprints[row],
+                    fingerprints[other_row],
+                    script_types[row] == script_types[other_row],
+                )
+            )
+            >= 50
+        ]
+        self.assertTrue(expected)
+        matrix = clustering.character_matrix(fingerprints)
+        # Chunks that don't divide the rows evenly are compared against each other.
+        for chunk_size in (7, 100):
+            self.assertEqual(
+                sorted(clustering.similar_pairs(matrix, script_types, 50, chunk_size)),
+                expected,
+            )
+
+    def test_batched_trees_match(self):
+        fingerprints = [fingerprint for _, _, fingerprint in self.versions]
+        script_types = [script_type for _, script_type, _ in self.versions]
+        pairs = list(
+            clustering.similar_pairs(
+                clustering.character_matrix(fingerprints), script_types, 40
+            )
+        )
+        trees = clustering.family_trees(len(fingerprints), pairs)
+        self.assertEqual(clustering.family_trees(len(fingerprints), pairs, 3), trees)
+
+        linked = {row for pair in pairs for row in pair[:2]}
+        self.assertEqual({row for tree in trees for row in tree}, linked)
+        for tree in trees:
+            roots = [row for row, (parent, _) in tree.items() if parent is None]
+            self.assertEqual(roots, [min(tree)])
+
+    def test_build_clusters(self):
+        clusters = clustering.build_clusters(40, chunk_size=7)
+        self.assertEqual(models.ScriptCluster.objects.count(), len(clusters))
+        for cluster in clusters:
+            members = cluster.members.all()
+            self.assertEqual(members.count(), cluster.size)
+            self.assertEqual(members.filter(parent=None).count(), 1)
+
+        call_command(
+            "cluster_scripts", "--threshold", "90", stdout=open(os.devnull, "w")
+        )
+        self.assertFalse(models.ScriptCluster.objects.exclude(threshold=90).exists())
+
+
+class DuplicatesTest(TestCase):
+    def setUp(self):
+        create_characters()
+
+    def upload(self, name, *ids, **kwargs):
+        return create_script_version(
+            name, *ids, content_hash=duplicates.content_hash(script(*ids)), **kwargs
+        )
+
+    def test_content_hash(self):
+        self.assertEqual(
+            duplicates.content_hash(script("imp", "chef", meta="One")),
+            duplicates.content_hash(script("chef", "imp", "imp", meta="Two")),
+        )
+        self.assertNotEqual(
+            duplicates.content_hash(script("imp", "chef")),
+            duplicates.content_hash(script("imp", "chef", HOMEBREW)),
+        )
+
+    def test_find_duplicates(self):
+        original = self.upload("Original", "imp", "chef", "spy")
+        self.upload("Original", "imp", "chef", "spy", version="2", latest=False)
+        copy = self.upload("Copy", "spy", "chef", "imp")
+        self.upload("Old copy", "imp", "chef", "spy", latest=False)
+        self.upload("Different", "imp", "chef")
+
+        self.assertEqual(list(duplicates.find_duplicates(original)), [copy])
+        self.assertEqual(
+            duplicates.duplicate_clusters(), {original.content_hash: [original, copy]}
+        )
+        self.assertTrue(duplicates.same_content(original, script("imp", "chef", "spy")))
+        self.assertFalse(duplicates.same_content(original, script("spy", "chef", "imp")))
+        self.assertFalse(duplicates.same_content(original, script("imp", "chef")))
+
+
+class CommentThreadsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.script = models.Script.objects.create(name="Script")
+
+    def comment(self, text, parent=None):
+        return models.Comment.objects.create(
+            user=self.user, script=self.script, comment=text, parent=parent
+        )
+
+    def threads(self, page_number=1):
+        _, threads = comments.get_comment_threads(self.script, page_number)
+        return [(thread["comment"].comment, thread["indent"]) for thread in threads]
+
+    def test_threads_in_order(self):
+        first = self.comment("First")
+        second = self.comment("Second")
+        reply = self.comment("Reply", first)
+        self.comment("Later reply", first)
+        self.comment("Nested", reply)
+        self.comment("Second reply", second)
+
+        self.assertEqual(
+            self.threads(),
+            [
+                ("First", 0),
+                ("Reply", 1),
+                ("Nested", 2),
+                ("Later reply", 1),
+                ("Second", 0),
+                ("Second reply", 1),
+            ],
+        )
+
+    def test_deep_threads_indent_stops(self):
+        parent = None
+        for i in range(comments.MAX_INDENT + 2):
+            parent = self.comment(str(i), parent)
+        self.assertEqual(
+            [indent for _, indent in self.threads()],
+            [0, 1, 2, 3, 4, 5, 6, 6],
+        )
+
+    def test_delete_moves_replies_up(self):
+        first = self.comment("First")
+        reply = self.comment("Reply", first)
+        self.comment("Nested", reply)
+        comments.delete_comment(reply)
+        self.assertEqual(self.threads(), [("First", 0), ("Nested", 1)])
+
+        comments.delete_comment(first)
+        self.assertEqual(self.threads(), [("Nested", 0)])
+        nested = models.Comment.objects.get()
+        self.assertEqual(nested.parent, None)
+        self.assertEqual(nested.path, f"{nested.pk:0{constants.COMMENT_PATH_DIGITS}d}/")
+
+    def test_paginated_on_threads(self):
+        threads = [
+            self.comment(f"Thread {i}") for i in range(comments.THREADS_PER_PAGE + 1)
+        ]
+        self.comment("Reply", threads[0])
+        page, _ = comments.get_comment_threads(self.script)
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual(len(self.threads()), comments.THREADS_PER_PAGE + 1)
+        self.assertEqual(self.threads(2), [(threads[-1].comment, 0)])
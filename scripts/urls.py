@@ -19,6 +19,10 @@ urlpatterns = [
     path("", views.ScriptsListView.as_view()),
     path("api/", include(router.urls)),
     path("api/statistics", api_views.StatisticsAPI.as_view()),
+    path("api/statistics/cooccurrence", api_views.CooccurrenceAPI.as_view()),
+    path("api/statistics/timeseries", api_views.TimeseriesAPI.as_view()),
+    path("api/statistics/churn", api_views.ChurnAPI.as_view()),
+    path("api/me/state", api_views.UserStateAPI.as_view()),
     path("api/translations/<str:language>/<str:character_id>/", translation_detail),
     path("collections", views.CollectionListView.as_view()),
     path(
@@ -62,6 +66,7 @@ urlpatterns = [
         name="download_all_roles_json",
     ),
     path("script/<int:pk>", views.ScriptView.as_view(), name="script"),
+    path("script/<int:pk>/compare", views.ScriptCompareView.as_view(), name="compare"),
     path("script/<int:pk>/<str:version>/similar", views.get_similar_scripts, name="similar"),
     path("script/<int:pk>/<str:version>", views.ScriptView.as_view(), name="script"),
     path("script/<int:pk>/<str:version>/vote", views.vote_for_script, name="vote"),
@@ -94,6 +99,7 @@ urlpatterns = [
     path("script/search", views.AdvancedSearchView.as_view(), name="advanced_search"),
     path("script/search/results", views.AdvancedSearchResultsView.as_view()),
     path("script/upload", views.ScriptUploadView.as_view(), name="upload"),
+    path("statistics/churn", views.ChurnStatisticsView.as_view()),
     path("statistics", views.StatisticsView.as_view()),
     path("statistics/<str:character>", views.StatisticsView.as_view()),
     path("statistics/tags/<int:tags>", views.StatisticsView.as_view()),
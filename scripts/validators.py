@@ -1,18 +1,7 @@
 from django.core.exceptions import ValidationError
 from django.conf import settings
 from versionfield.forms import VersionField
-from scripts import models
-
-
-def check_for_homebrew(item):
-    """
-    Homebrew characters are not supported in the custom script database.
-    """
-    if item.get("id", "") != "_meta":
-        if len(item) > 1:
-            raise ValidationError(
-                f"Only officially supported characters from https://bloodontheclocktower.com/script/ are supported"
-            )
+from scripts import script_json
 
 
 def prevent_fishbucket(json):
@@ -26,24 +15,21 @@ def prevent_fishbucket(json):
         )
 
 
-def validate_json(json):
+def validate_json(json, analysis=None):
     if settings.DISABLE_VALIDATORS:
         return
 
+    if analysis is None:
+        analysis = script_json.analyse_script(json)
+
     MIN_KNOWN_CHARACTERS = round(len(json) / 2)
-    contains_character = 0
     prevent_fishbucket(json)
-    for item in json:
-        check_for_homebrew(item)
-        if contains_character < MIN_KNOWN_CHARACTERS:
-            try:
-                models.Character.objects.get(
-                    character_id=item.get("id", "DoesNotExist")
-                )
-                contains_character += 1
-            except models.Character.DoesNotExist:
-                continue
-    if contains_character < MIN_KNOWN_CHARACTERS:
+    # Homebrew characters are not supported in the custom script database.
+    if analysis.contains_homebrew:
+        raise ValidationError(
+            f"Only officially supported characters from https://bloodontheclocktower.com/script/ are supported"
+        )
+    if analysis.num_known < MIN_KNOWN_CHARACTERS:
         raise ValidationError(
             f"Script must contain at least {MIN_KNOWN_CHARACTERS} official Blood on the Clocktower character"
         )
@@ -8,7 +8,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import permission_required
-from django.db.models import Case, When, Count
+from django.db.models import Case, When
 from django.http import (
     FileResponse,
     JsonResponse,
@@ -18,24 +18,44 @@ from django.http import (
     HttpResponse,
 )
 from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control
 from django.views import generic
 from django_filters.views import FilterView
 from django_tables2.views import SingleTableMixin, SingleTableView
 from versionfield import Version
 
 from scripts import (
+    characters,
+    comments,
+    diffs,
+    duplicates,
     filters,
     forms,
+    minhash,
     models,
     script_json,
+    search,
+    similarity,
+    statistics,
     tables,
 )
 from collections import Counter
-from django.contrib.postgres.search import TrigramSimilarity
 from dataclasses import dataclass
 from typing import Dict, Any, List, Optional
 import requests
 
+# Pages that render the same HTML for every user may be kept by shared caches for
+# this long. Browsers revalidate each time, so a user sees their own vote or
+# upload as soon as they're sent back to the page.
+SHARED_CACHE_TIMEOUT = 60
+
+
+def allow_shared_cache(response: HttpResponse) -> HttpResponse:
+    patch_cache_control(
+        response, public=True, max_age=0, s_maxage=SHARED_CACHE_TIMEOUT
+    )
+    return response
+
 
 class ScriptsListView(SingleTableMixin, FilterView):
     model = models.ScriptVersion
@@ -44,10 +64,24 @@ class ScriptsListView(SingleTableMixin, FilterView):
     ordering = ["-pk"]
     script_view = None
 
+    def get_queryset(self):
+        return (
+            super(ScriptsListView, self)
+            .get_queryset()
+            .select_related("script")
+            .with_stats(*tables.ScriptTable.stats)
+        )
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if self.filterset.is_user_specific():
+            patch_cache_control(response, private=True)
+        else:
+            allow_shared_cache(response)
+        return response
+
     def get_filterset_class(self):
-        if self.request.user.is_authenticated:
-            return filters.FavouriteScriptVersionFilter
-        return filters.ScriptVersionFilter
+        return filters.FavouriteScriptVersionFilter
 
     def get_filterset_kwargs(self, filterset_class):
         kwargs = super(ScriptsListView, self).get_filterset_kwargs(filterset_class)
@@ -56,9 +90,7 @@ class ScriptsListView(SingleTableMixin, FilterView):
         return kwargs
 
     def get_table_class(self):
-        if self.request.user.is_authenticated:
-            return tables.UserScriptTable
-        return tables.ScriptTable
+        return tables.UserScriptTable
 
 
 class UserScriptsListView(LoginRequiredMixin, SingleTableMixin, FilterView):
@@ -73,7 +105,12 @@ class UserScriptsListView(LoginRequiredMixin, SingleTableMixin, FilterView):
         return filters.ScriptVersionFilter
 
     def get_queryset(self):
-        queryset = super(UserScriptsListView, self).get_queryset()
+        queryset = (
+            super(UserScriptsListView, self)
+            .get_queryset()
+            .select_related("script")
+            .with_stats(*tables.UserScriptTable.stats)
+        )
         if self.script_view == "favourite":
             queryset = queryset.filter(favourites__user=self.request.user)
         elif self.script_view == "owned":
@@ -87,99 +124,6 @@ class UserScriptsListView(LoginRequiredMixin, SingleTableMixin, FilterView):
         return kwargs
 
 
-def get_json_additions(old_json, new_json):
-    for old_id in old_json:
-        if old_id["id"] == "_meta":
-            continue
-        for new_id in new_json:
-            if new_id["id"] == "_meta":
-                continue
-
-            if old_id == new_id:
-                new_json.remove(new_id)
-
-    for new_id in new_json:
-        if new_id["id"] == "_meta":
-            new_json.remove(new_id)
-            break
-
-    return new_json
-
-
-def get_similarity(json1: List, json2: List, same_type: bool) -> int:
-    similarity = 0
-    similarity_max = max(len(json1), len(json2))
-    similarity_min = min(len(json1), len(json2))
-    id2_meta = 0
-    for id in json1:
-        if id.get("id", "") == "_meta":
-            similarity_max = min(similarity_max, len(json1) - 1)
-            similarity_min = min(similarity_min, len(json1) - 1)
-            continue
-        for id2 in json2:
-            if id2.get("id", "") == "_meta":
-                similarity_max = min(similarity_max, len(json2) - 1)
-                similarity_min = min(similarity_min, len(json2) - 1)
-                id2_meta = 1
-                continue
-            if id.get("id", "id1") == id2.get("id", "id2"):
-                similarity += 1
-                break
-
-    similarity_comp = similarity_max if same_type else similarity_min
-    if similarity_comp == 0:
-        return 0
-
-    return round((similarity / similarity_comp) * 100)
-
-
-def get_comment_data(comment: models.Comment, indent: int) -> List:
-    data = []
-    comment_data = {}
-    comment_data["comment"] = comment
-    comment_data["indent"] = indent
-    data.append(comment_data)
-    for child_comment in comment.children.all().order_by("created"):
-        data.extend(get_comment_data(child_comment, min(indent + 1, 6)))
-    return data
-
-
-def get_comments(script: models.Script) -> Dict:
-    comments = []
-    for comment in script.comments.filter(parent__isnull=True).order_by("created"):
-        comments.extend(get_comment_data(comment, 0))
-    return comments
-
-
-def count_character(script_content: Dict, character_type: models.CharacterType) -> int:
-    count = 0
-    for json_entry in script_content:
-        try:
-            character = models.Character.objects.get(character_id=json_entry.get("id"))
-        except models.Character.DoesNotExist:
-            continue
-        if character and character.character_type == character_type:
-            count += 1
-    return count
-
-
-def calculate_edition(script_content: Dict) -> int:
-    edition = models.Edition.BASE
-    for json_entry in script_content:
-        try:
-            character = models.Character.objects.get(character_id=json_entry.get("id"))
-        except models.Character.DoesNotExist:
-            continue
-
-        if character and character.edition > edition:
-            edition = character.edition
-
-        if edition == models.Edition.CLOCKTOWER_APP:
-            return edition
-
-    return edition
-
-
 class ScriptView(generic.DetailView):
     template_name = "script.html"
     model = models.Script
@@ -191,7 +135,9 @@ class ScriptView(generic.DetailView):
         _messages = messages.get_messages(request)
         for message in _messages:
             context["activetab"] = message.message
-        return self.render_to_response(context)
+        if "comments_page" in request.GET:
+            context["activetab"] = "comments-tab"
+        return allow_shared_cache(self.render_to_response(context))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -206,36 +152,18 @@ class ScriptView(generic.DetailView):
             current_script = self.object.versions.order_by("-version").first()
         context["script_version"] = current_script
 
-        changes = {}
-        diff_script_version = None
-        for script_version in self.object.versions.all().order_by("-version"):
-            # If we're looking at an older script, don't show changes future to that.
-            if script_version.version > current_script.version:
-                continue
-
-            if diff_script_version:
-                changes[diff_script_version.version] = {}
-                changes[diff_script_version.version]["additions"] = get_json_additions(
-                    script_version.content.copy(), diff_script_version.content.copy()
-                )
-                changes[diff_script_version.version]["deletions"] = get_json_additions(
-                    diff_script_version.content.copy(), script_version.content.copy()
-                )
-                changes[diff_script_version.version][
-                    "previous_version"
-                ] = script_version.version
-            diff_script_version = script_version
-
-        context["changes"] = changes
+        context["changes"] = diffs.version_history(current_script)
         context["script_version"] = current_script
-        context["comments"] = get_comments(current_script.script)
+        context["comments_page"], context["comments"] = comments.get_comment_threads(
+            current_script.script, self.request.GET.get("comments_page", 1)
+        )
         context["languages"] = (
             models.Translation.objects.values_list("language", flat=True)
             .distinct("language")
             .order_by("language")
         )
 
-        context["can_delete"] = self.request.user == current_script.script.owner
+        context["duplicates"] = duplicates.find_duplicates(current_script)
 
         return context
 
@@ -298,14 +226,30 @@ def download_all_roles_json(request, language: Optional[str] = None) -> FileResp
 
 
 def update_script(script_version, cleaned_data, author):
+    # The script type partitions the character statistics.
+    type_changed = script_version.script_type != cleaned_data["script_type"]
+    if type_changed:
+        statistics.record_script_version(script_version, -1)
+        if script_version.latest:
+            similarity.remove_similar_script(script_version)
     script_version.script_type = cleaned_data["script_type"]
     script_version.author = author
+    # Only write the edited fields, so the signal maintained counters aren't
+    # overwritten with this instance's stale copies.
+    updated_fields = ["script_type", "author"]
     if cleaned_data.get("notes", None):
         script_version.notes = cleaned_data["notes"]
+        updated_fields.append("notes")
     if cleaned_data.get("pdf", None):
         script_version.pdf = cleaned_data["pdf"]
+        updated_fields.append("pdf")
     script_version.tags.set(cleaned_data["tags"])
-    script_version.save()
+    script_version.save(update_fields=updated_fields)
+    if type_changed:
+        statistics.record_script_version(script_version, 1)
+        if script_version.latest:
+            similarity.add_similar_script(script_version)
+    search.update_search_vector(script_version)
 
 
 class ScriptUploadView(generic.FormView):
@@ -441,40 +385,29 @@ class ScriptUploadView(generic.FormView):
                 return HttpResponseRedirect(self.get_success_url())
             except models.ScriptVersion.DoesNotExist:
                 # This is not an existing version.
-                if script.latest_version():
+                latest_version = script.latest_version()
+                if latest_version:
                     # We need to protect this code against instances where a script doesn't
                     # have a latest version.
-                    if script.latest_version().content == json:
+                    if duplicates.same_content(latest_version, json):
                         # The content hasn't change from the latest version, so just update
                         # that.
-                        update_script(
-                            script.latest_version(), form.cleaned_data, author
-                        )
-                        self.script_version = script.latest_version()
+                        update_script(latest_version, form.cleaned_data, author)
+                        self.script_version = latest_version
                         return HttpResponseRedirect(self.get_success_url())
 
-                    if (
-                        Version(form.cleaned_data["version"])
-                        > script.latest_version().version
-                    ):
+                    if Version(form.cleaned_data["version"]) > latest_version.version:
                         # This is newer than the latest version, so set that
                         # version to not be latest.
-                        current_tags = script.latest_version().tags
-                        latest_version = script.latest_version()
-                        latest_version.latest = False
-                        latest_version.save()
+                        current_tags = latest_version.tags
+                        similarity.remove_similar_script(latest_version)
+                        statistics.set_latest(latest_version, False)
                     else:
                         # We're uploading an older version, so don't mark this version
                         # as the latest, that's still the current latest.
                         is_latest = False
 
-        num_townsfolk = count_character(json, models.CharacterType.TOWNSFOLK)
-        num_outsiders = count_character(json, models.CharacterType.OUTSIDER)
-        num_minions = count_character(json, models.CharacterType.MINION)
-        num_demons = count_character(json, models.CharacterType.DEMON)
-        num_fabled = count_character(json, models.CharacterType.FABLED)
-        num_travellers = count_character(json, models.CharacterType.TRAVELLER)
-        edition = calculate_edition(json)
+        analysis = form.analysis or script_json.analyse_script(json)
 
         # Create the Script Version object from the form.
         self.script_version = models.ScriptVersion.objects.create(
@@ -485,17 +418,20 @@ class ScriptUploadView(generic.FormView):
             pdf=form.cleaned_data["pdf"],
             author=author,
             latest=is_latest,
-            num_townsfolk=num_townsfolk,
-            num_outsiders=num_outsiders,
-            num_minions=num_minions,
-            num_demons=num_demons,
-            num_fabled=num_fabled,
-            num_travellers=num_travellers,
-            edition=edition,
+            num_comments=script.comments.count(),
+            content_hash=duplicates.content_hash(json),
+            **analysis.model_fields(),
         )
+        characters.update_script_characters(self.script_version)
+        minhash.update_signature(self.script_version)
+        statistics.record_script_version(self.script_version, 1)
+        diffs.record_upload(self.script_version)
+        if is_latest:
+            similarity.add_similar_script(self.script_version)
         if form.cleaned_data.get("notes", None):
             self.script_version.notes = form.cleaned_data["notes"]
-            self.script_version.save()
+            self.script_version.save(update_fields=["notes"])
+        search.update_search_vector(self.script_version)
         self.script_version.tags.set(form.cleaned_data["tags"])
         if current_tags:
             for tag in current_tags.all():
@@ -529,12 +465,19 @@ class ScriptDeleteView(LoginRequiredMixin, generic.edit.BaseDeleteView):
 
         if script.owner != self.request.user:
             return HttpResponseForbidden()
+        statistics.record_script_version(script_version, -1)
+        if script_version.latest:
+            similarity.remove_similar_script(script_version)
+        following = diffs.next_version(script_version)
         script_version.delete()
+        if following:
+            diffs.update_version_diff(following)
 
         if script.versions.count() > 0:
             latest_version = script.latest_version()
-            latest_version.latest = True
-            latest_version.save()
+            if not latest_version.latest:
+                statistics.set_latest(latest_version, True)
+                similarity.add_similar_script(latest_version)
             self.success_url = f"/script/{script.pk}"
         else:
             script.delete()
@@ -553,6 +496,10 @@ class StatisticsView(generic.ListView, FilterView):
         context = super().get_context_data(**kwargs)
         stats_character = None
         characters_to_display = 5
+        edition = None
+        # Whether the queryset is filtered by anything other than latest or edition,
+        # which the precomputed statistics can't answer.
+        filtered = False
 
         if "all" in self.request.GET:
             queryset = models.ScriptVersion.objects.all()
@@ -563,27 +510,26 @@ class StatisticsView(generic.ListView, FilterView):
             context["filter"] = self.get_filterset(self.get_filterset_class())
             if "is_owner" in self.request.GET:
                 queryset = queryset.filter(script__owner=self.request.user)
+                filtered = True
 
         if "character" in self.kwargs:
-            try:
-                stats_character = models.Character.objects.get(
-                    character_id=self.kwargs.get("character")
-                )
-                queryset = queryset.filter(
-                    content__contains=[{"id": stats_character.character_id}]
-                )
-            except models.Character.DoesNotExist:
+            stats_character = characters.get_character(self.kwargs.get("character"))
+            if stats_character is None:
                 raise Http404()
+            queryset = queryset.filter(filters.has_character(stats_character))
+            filtered = True
         elif "tags" in self.kwargs:
             tags = models.ScriptTag.objects.get(pk=self.kwargs.get("tags"))
             if tags:
                 queryset = models.ScriptVersion.objects.filter(tags__in=[tags])
+                filtered = True
 
         if "tags" in self.request.GET:
             try:
                 tags = models.ScriptTag.objects.get(pk=self.request.GET.get("tags"))
                 if tags:
                     queryset = queryset.filter(tags__in=[tags])
+                    filtered = True
             except ValueError:
                 pass
 
@@ -603,24 +549,25 @@ class StatisticsView(generic.ListView, FilterView):
             except ValueError:
                 pass
 
-        context["total"] = queryset.count()
-        if queryset.count() == 0:
+        if filtered:
+            # If we're on a Character Statistics page, don't include this character in the count.
+            total = queryset.count()
+            counts = statistics.character_counts(queryset, exclude=stats_character)
+        else:
+            total, counts = statistics.precomputed_character_counts(
+                latest_only="all" not in self.request.GET, edition=edition
+            )
+
+        context["total"] = total
+        if total == 0:
             return context
 
         character_count = {}
-        num_count = {}
         for type in models.CharacterType:
             character_count[type.value] = Counter()
-            num_count[type.value] = Counter()
-
-        for character in models.Character.objects.all():
-            # If we're on a Character Statistics page, don't include this character in the count.
-            if character == stats_character:
-                continue
 
-            character_count[character.character_type][character] = queryset.filter(
-                content__contains=[{"id": character.character_id}]
-            ).count()
+        for character, count in counts.items():
+            character_count[character.character_type][character] = count
 
         for type in models.CharacterType:
             context[type.value] = character_count[type.value].most_common(
@@ -630,45 +577,91 @@ class StatisticsView(generic.ListView, FilterView):
                 : ((characters_to_display + 1) * -1) : -1
             ]
 
-        townsfolk = queryset.order_by("num_townsfolk")
-        for i in range(
-            townsfolk.first().num_townsfolk, townsfolk.last().num_townsfolk + 1
-        ):
-            num_count[models.CharacterType.TOWNSFOLK.value][str(i)] = queryset.filter(
-                num_townsfolk=i
-            ).count()
-        outsider = queryset.order_by("num_outsiders")
-        for i in range(
-            outsider.first().num_outsiders, outsider.last().num_outsiders + 1
-        ):
-            num_count[models.CharacterType.OUTSIDER.value][str(i)] = queryset.filter(
-                num_outsiders=i
-            ).count()
-        minion = queryset.order_by("num_minions")
-        for i in range(minion.first().num_minions, minion.last().num_minions + 1):
-            num_count[models.CharacterType.MINION.value][str(i)] = queryset.filter(
-                num_minions=i
-            ).count()
-        demon = queryset.order_by("num_demons")
-        for i in range(demon.first().num_demons, demon.last().num_demons + 1):
-            num_count[models.CharacterType.DEMON.value][str(i)] = queryset.filter(
-                num_demons=i
-            ).count()
-        traveller = queryset.order_by("num_travellers")
-        for i in range(
-            traveller.first().num_travellers, traveller.last().num_travellers + 1
-        ):
-            num_count[models.CharacterType.TRAVELLER.value][str(i)] = queryset.filter(
-                num_travellers=i
-            ).count()
-        fabled = queryset.order_by("num_fabled")
-        for i in range(fabled.first().num_fabled, fabled.last().num_fabled + 1):
-            num_count[models.CharacterType.FABLED.value][str(i)] = queryset.filter(
-                num_fabled=i
-            ).count()
+        context["num_count"] = statistics.type_histograms(queryset)
+
+        return context
+
+
+class ScriptCompareView(generic.DetailView):
+    """
+    The characters added, removed and unchanged between two versions of a script,
+    defaulting to the latest version and the one before it.
+    """
+
+    template_name = "compare.html"
+    model = models.Script
+
+    def get_version(self, version: Optional[str]) -> models.ScriptVersion:
+        try:
+            return self.object.versions.get(version=version)
+        except (models.ScriptVersion.DoesNotExist, ValueError):
+            raise Http404("Cannot compare a script version that does not exist.")
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        if "to" in self.request.GET:
+            new_version = self.get_version(self.request.GET["to"])
+        else:
+            new_version = self.object.latest_version()
+        if "from" in self.request.GET:
+            old_version = self.get_version(self.request.GET["from"])
+        else:
+            old_version = diffs.previous_version(new_version) or new_version
+
+        comparison = diffs.compare_versions(old_version, new_version)
+        context["old_version"] = old_version
+        context["new_version"] = new_version
+        context["groups"] = []
+        for type in comparison["unchanged"]:
+            group = [comparison[change][type] for change in comparison]
+            if any(group):
+                context["groups"].append((type, *group))
+        return context
+
+
+class ChurnStatisticsView(generic.TemplateView):
+    """
+    The characters most often added to and removed from scripts between versions.
+    """
+
+    template_name = "churn_statistics.html"
+
+    def get_diffs(self):
+        return diffs.filter_diffs(**diffs.parse_diff_filters(self.request.GET))
+
+    def get_total(self, version_diffs) -> int:
+        return version_diffs.count()
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        characters_to_display = 5
+
+        if "num" in self.request.GET:
+            try:
+                if int(self.request.GET.get("num")):
+                    characters_to_display = int(self.request.GET.get("num"))
+                    if characters_to_display < 1:
+                        characters_to_display = 5
+            except ValueError:
+                pass
+
+        version_diffs = self.get_diffs()
+        context["total"] = self.get_total(version_diffs)
+        churn = diffs.character_churn(version_diffs)
+
         for type in models.CharacterType:
-            num_count[type.value] = dict(num_count[type.value])
-        context["num_count"] = num_count
+            additions = Counter()
+            removals = Counter()
+            for character, count in churn["additions"].items():
+                if character.character_type == type:
+                    additions[character] = count
+                    removals[character] = churn["removals"][character]
+            context[type.value + "addition"] = additions.most_common(
+                characters_to_display
+            )
+            context[type.value + "deletion"] = removals.most_common(
+                characters_to_display
+            )
 
         return context
 
@@ -712,13 +705,6 @@ def vote_for_script(request, pk: int, version: str) -> None:
     update_user_related_script(models.Vote, request.user, script_version)
     return redirect(request.POST["next"])
 
-def map_similar_scripts(data):
-    return {
-        'value': data[1],
-        'name': data[0].script.name,
-        'scriptPK': data[0].script.pk,
-    }
-
 # Seperate call to calculate similar scripts so we can lazy load it
 def get_similar_scripts(request, pk: int, version: str) -> JsonResponse:
     if request.method != "GET":
@@ -727,36 +713,24 @@ def get_similar_scripts(request, pk: int, version: str) -> JsonResponse:
     current_script = models.ScriptVersion.objects.filter(
             script=pk, version=version
     )[0]
-    
-    similarity = {}
-    similarity[models.ScriptTypes.TEENSYVILLE.value] = {}
-    similarity[models.ScriptTypes.FULL.value] = {}
-    for script_version in models.ScriptVersion.objects.filter(latest=True).order_by(
-        "pk"
-    ):
-        if current_script == script_version:
-            continue
 
-        similarity[script_version.script_type][script_version] = get_similarity(
-            current_script.content,
-            script_version.content,
-            current_script.script_type == script_version.script_type,
+    mode = request.GET.get("mode", "exact")
+    if mode not in similarity.SIMILARITY_MODES:
+        raise Http404()
+    try:
+        min_bands = int(request.GET.get("min_bands", 1))
+    except ValueError:
+        min_bands = 1
+
+    if mode == "exact" and current_script.latest:
+        similar_scripts = similarity.get_stored_similar_scripts(current_script)
+    else:
+        similar_scripts = similarity.get_similar_scripts(
+            current_script, mode=mode, min_bands=min_bands
         )
-    teensville_scripts = map(map_similar_scripts, sorted(
-        similarity[models.ScriptTypes.TEENSYVILLE].items(),
-        key=lambda x: x[1],
-        reverse=True,
-    )[:10])
-
-    full_scripts = map(map_similar_scripts, sorted(
-        similarity[models.ScriptTypes.FULL].items(),
-        key=lambda x: x[1],
-        reverse=True,
-    )[:10])
-    
     return JsonResponse({
-        'full': list(full_scripts),
-        'teensyville': list(teensville_scripts)
+        'full': similar_scripts[models.ScriptTypes.FULL],
+        'teensyville': similar_scripts[models.ScriptTypes.TEENSYVILLE]
     })
 
 
@@ -769,9 +743,8 @@ def favourite_script(request, pk: int, version: str) -> None:
 
 
 def translate_character(character_id: str, language: str) -> Dict:
-    try:
-        character = models.Character.objects.get(character_id=character_id)
-    except models.Character.DoesNotExist:
+    character = characters.get_character(character_id)
+    if character is None:
         return {}
 
     original_character = character.full_character_json()
@@ -836,15 +809,10 @@ def download_unsupported_json(request, pk: int, version: str) -> FileResponse:
             content.append(character_json)
             continue
 
-        try:
-            character = models.Character.objects.get(
-                character_id=character_json.get("id")
-            )
-            if character.edition == models.Edition.CLOCKTOWER_APP:
-                content.append(character.full_character_json())
-            else:
-                content.append(character_json)
-        except models.Character.DoesNotExist:
+        character = characters.get_character(character_json.get("id"))
+        if character and character.edition == models.Edition.CLOCKTOWER_APP:
+            content.append(character.full_character_json())
+        else:
             content.append(character_json)
 
     return json_file_response(script.name, content)
@@ -874,13 +842,15 @@ class CollectionScriptListView(SingleTableView):
         collection = models.Collection.objects.get(pk=self.kwargs["pk"])
         if self.request.user == collection.owner:
             return tables.CollectionScriptTable
-        elif self.request.user.is_authenticated:
-            return tables.UserScriptTable
-        return tables.ScriptTable
+        return tables.UserScriptTable
 
     def get_queryset(self):
         collection = models.Collection.objects.get(pk=self.kwargs["pk"])
-        return collection.scripts.order_by("pk")
+        return (
+            collection.scripts.order_by("pk")
+            .select_related("script")
+            .with_stats(*tables.ScriptTable.stats)
+        )
 
 
 class CollectionListView(SingleTableMixin, FilterView):
@@ -1048,15 +1018,8 @@ class CommentDeleteView(LoginRequiredMixin, generic.View):
         if comment.user != request.user:
             raise Http404("Cannot delete a comment you did not make.")
 
-        if comment.parent:
-            # If this comment has a parent then update all our child comments to point
-            # to that same parent.
-            for child in comment.children.all():
-                child.parent = comment.parent
-                child.save()
-
         success_url = f"/script/{comment.script.pk}"
-        comment.delete()
+        comments.delete_comment(comment)
         messages.success(request, "comments-tab")
         return HttpResponseRedirect(success_url)
 
@@ -1072,7 +1035,12 @@ class AdvancedSearchResultsView(SingleTableView):
         if self.request.session.get("queryset"):
             ids = self.request.session.get("queryset")
             order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)])
-            queryset = models.ScriptVersion.objects.filter(pk__in=ids).order_by(order)
+            queryset = (
+                models.ScriptVersion.objects.filter(pk__in=ids)
+                .order_by(order)
+                .select_related("script")
+                .with_stats(*tables.ScriptTable.stats)
+            )
             return queryset
         elif self.request.session.get("num_results") == 0:
             return models.ScriptVersion.objects.none()
@@ -1080,9 +1048,7 @@ class AdvancedSearchResultsView(SingleTableView):
             return models.ScriptVersion.objects.all()
 
     def get_table_class(self):
-        if self.request.user.is_authenticated:
-            return tables.UserScriptTable
-        return tables.ScriptTable
+        return tables.UserScriptTable
 
 
 class AdvancedSearchView(generic.FormView, SingleTableMixin):
@@ -1091,50 +1057,19 @@ class AdvancedSearchView(generic.FormView, SingleTableMixin):
     script_version = None
 
     def get_form(self):
-        townsfolk = models.ScriptVersion.objects.all().order_by("num_townsfolk")
-        townsfolk_choices = [
-            (i, i)
-            for i in range(
-                townsfolk.first().num_townsfolk, townsfolk.last().num_townsfolk + 1
-            )
-        ]
-        outsider = models.ScriptVersion.objects.all().order_by("num_outsiders")
-        outsider_choices = [
-            (i, i)
-            for i in range(
-                outsider.first().num_outsiders, outsider.last().num_outsiders + 1
-            )
-        ]
-        minion = models.ScriptVersion.objects.all().order_by("num_minions")
-        minion_choices = [
-            (i, i)
-            for i in range(minion.first().num_minions, minion.last().num_minions + 1)
-        ]
-        demon = models.ScriptVersion.objects.all().order_by("num_demons")
-        demon_choices = [
-            (i, i) for i in range(demon.first().num_demons, demon.last().num_demons + 1)
-        ]
-        fabled = models.ScriptVersion.objects.all().order_by("num_fabled")
-        fabled_choices = [
-            (i, i)
-            for i in range(fabled.first().num_fabled, fabled.last().num_fabled + 1)
-        ]
-        travellers = models.ScriptVersion.objects.all().order_by("num_travellers")
-        traveller_choices = [
-            (i, i)
-            for i in range(
-                travellers.first().num_travellers, travellers.last().num_travellers + 1
-            )
-        ]
-        travellers = travellers.last()
+        histograms = statistics.type_histograms(models.ScriptVersion.objects.all())
+        choices = {
+            type: [(int(i), int(i)) for i in histogram]
+            for type, histogram in histograms.items()
+        }
 
         return forms.AdvancedSearchForm(
-            townsfolk_choices=townsfolk_choices,
-            outsider_choices=outsider_choices,
-            minion_choices=minion_choices,
-            demon_choices=demon_choices,
-            fabled_choices=fabled_choices,
-            traveller_choices=traveller_choices,
+            townsfolk_choices=choices[models.CharacterType.TOWNSFOLK.value],
+            outsider_choices=choices[models.CharacterType.OUTSIDER.value],
+            minion_choices=choices[models.CharacterType.MINION.value],
+            demon_choices=choices[models.CharacterType.DEMON.value],
+            fabled_choices=choices[models.CharacterType.FABLED.value],
+            traveller_choices=choices[models.CharacterType.TRAVELLER.value],
             **self.get_form_kwargs(),
         )
 
@@ -1146,23 +1081,19 @@ class AdvancedSearchView(generic.FormView, SingleTableMixin):
             queryset = models.ScriptVersion.objects.filter(latest=True)
 
         if form.cleaned_data.get("name"):
-            queryset = queryset.annotate(
-                name_similarity=TrigramSimilarity(
-                    "script__name", form.cleaned_data.get("name")
-                )
-            )
-            queryset = queryset.filter(name_similarity__gt=0).order_by(
-                "-name_similarity"
-            )
+            queryset = filters.trigram_search(
+                queryset,
+                "script__name",
+                form.cleaned_data.get("name"),
+                similarity="name_similarity",
+            ).order_by("-name_similarity")
         if form.cleaned_data.get("author"):
-            queryset = queryset.annotate(
-                author_similarity=TrigramSimilarity(
-                    "author", form.cleaned_data.get("author")
-                )
-            )
-            queryset = queryset.filter(author_similarity__gt=0).order_by(
-                "-author_similarity"
-            )
+            queryset = filters.trigram_search(
+                queryset,
+                "author",
+                form.cleaned_data.get("author"),
+                similarity="author_similarity",
+            ).order_by("-author_similarity")
 
         if form.cleaned_data.get("includes_characters"):
             queryset = filters.include_characters(
@@ -1213,19 +1144,16 @@ class AdvancedSearchView(generic.FormView, SingleTableMixin):
             )
 
         if form.cleaned_data.get("minimum_number_of_likes"):
-            queryset = queryset.annotate(score=Count("votes"))
             queryset = queryset.filter(
                 score__gte=form.cleaned_data.get("minimum_number_of_likes")
             )
 
         if form.cleaned_data.get("minimum_number_of_favourites"):
-            queryset = queryset.annotate(num_favs=Count("favourites"))
             queryset = queryset.filter(
                 num_favs__gte=form.cleaned_data.get("minimum_number_of_favourites")
             )
 
         if form.cleaned_data.get("minimum_number_of_comments"):
-            queryset = queryset.annotate(num_comments=Count("script__comments"))
             queryset = queryset.filter(
                 num_comments__gte=form.cleaned_data.get("minimum_number_of_comments")
             )
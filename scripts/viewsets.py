@@ -4,7 +4,9 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
 from rest_framework.schemas.openapi import AutoSchema
-from scripts import models, serializers
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from scripts import characters, diffs, models, serializers
 from scripts import filters as filtersets
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -18,16 +20,39 @@ class ScriptViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ["-pk"]
 
     def get_queryset(self):
-        queryset = models.ScriptVersion.objects.all()
+        queryset = models.ScriptVersion.objects.select_related("script").with_stats(
+            "score"
+        )
         latest = self.request.query_params.get("latest")
         if latest:
-            queryset = models.ScriptVersion.objects.filter(latest=True)
+            queryset = queryset.filter(latest=True)
         return queryset
 
     @action(methods=["get"], detail=True)
     def json(self, request, pk=None):
         return Response(models.ScriptVersion.objects.get(pk=pk).content)
 
+    @action(methods=["get"], detail=True, url_path=r"compare/(?P<other_pk>\d+)")
+    def compare(self, request, pk=None, other_pk=None):
+        """
+        The characters added, removed and unchanged going from this script version
+        to another, which may be of a different script.
+        """
+        old_version = get_object_or_404(models.ScriptVersion, pk=pk)
+        new_version = get_object_or_404(models.ScriptVersion, pk=other_pk)
+        response = Response(
+            {
+                "from": old_version.pk,
+                "to": new_version.pk,
+                **diffs.compare_versions(old_version, new_version),
+            }
+        )
+        # The comparison changes only when the characters do.
+        catalog_version = characters.get_catalog().version
+        response["ETag"] = f'"{catalog_version}-{old_version.pk}-{new_version.pk}"'
+        patch_cache_control(response, public=True, max_age=diffs.COMPARISON_TIMEOUT)
+        return response
+
 
 class TranslationViewSet(viewsets.ModelViewSet):
     queryset = models.Translation.objects.all()